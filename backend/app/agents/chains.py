@@ -0,0 +1,37 @@
+"""
+Prebuilt LLM chains for the agent nodes.
+Prompt templates and parsers are built once at import; the
+`prompt | llm | parser` chain is composed on first use and only rebuilt
+when get_llm() starts returning a different model (e.g. the LLM was
+configured after startup), so nodes never capture a stale or missing LLM.
+"""
+
+import threading
+from typing import Callable, Optional
+
+from langchain_core.runnables import Runnable
+
+from app.core.llm import get_llm
+
+
+class LazyChain:
+    """A chain built from the current LLM on demand and reused after that."""
+
+    def __init__(self, build: Callable[[object], Runnable], task: Optional[str] = None):
+        self._build = build
+        self._task = task
+        self._llm = None
+        self._chain: Optional[Runnable] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[Runnable]:
+        """The chain for the current LLM, or None when no LLM is available."""
+        llm = get_llm(task=self._task)
+        if llm is None:
+            return None
+        if llm is not self._llm:
+            with self._lock:
+                if llm is not self._llm:
+                    self._chain = self._build(llm)
+                    self._llm = llm
+        return self._chain
@@ -1,13 +1,30 @@
 import logging
 from app.agents.state import AgentState
 from app.services.email_service import get_all_emails
-from app.core.llm import get_llm
+from app.agents.chains import LazyChain
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 from pydantic import BaseModel, Field
 
 logger = logging.getLogger(__name__)
 
+EMAIL_AGENT_PROMPT = (
+    "You are an AI personal assistant (MemAG).\n"
+    "The user asked about their emails: '{input}'\n\n"
+    "Here are the most recent/relevant emails in their inbox:\n{emails}\n\n"
+    "Answer the user's question. Be helpful, professional, and concise."
+)
+
+_chain = LazyChain(
+    lambda llm: ChatPromptTemplate.from_template(EMAIL_AGENT_PROMPT) | llm | StrOutputParser()
+)
+
+
+def _email_context() -> str:
+    """The five most recent emails, one line each."""
+    return "\n".join([f"- ID: {e['id']} | From: {e['sender']} | Subj: {e['subject']} | Score: {e.get('urgency', 0)}" for e in get_all_emails(limit=5)])
+
+
 def email_agent_node(state: AgentState):
     """
     Handles queries related to email data.
@@ -17,22 +34,14 @@ def email_agent_node(state: AgentState):
     last_message = state["messages"][-1].content
     
     # 1. Look up recent or priority emails from the database
-    all_emails = get_all_emails()
-    emails_text = "\n".join([f"- ID: {e['id']} | From: {e['sender']} | Subj: {e['subject']} | Score: {e.get('urgency', 0)}" for e in all_emails[:5]])
+    emails_text = _email_context()
 
     # 2. Formulate a response about the emails based on the query
-    llm = get_llm()
-    prompt = ChatPromptTemplate.from_template(
-        "You are an AI personal assistant (MemAG).\n"
-        "The user asked about their emails: '{input}'\n\n"
-        "Here are the most recent/relevant emails in their inbox:\n{emails}\n\n"
-        "Answer the user's question. Be helpful, professional, and concise."
-    )
-    
-    from langchain_core.output_parsers import StrOutputParser
-    chain = prompt | llm | StrOutputParser()
+    chain = _chain.get()
     
     try:
+        if chain is None:
+            raise RuntimeError("No LLM configured")
         response = chain.invoke({
             "input": last_message,
             "emails": emails_text
@@ -45,3 +54,28 @@ def email_agent_node(state: AgentState):
         "output": response,
         "next_node": "FINISH"
     }
+
+
+async def aemail_agent_node(state: AgentState):
+    """Async email_agent_node (uses the chain's native ainvoke)."""
+    logger.info("--- EMAIL AGENT ---")
+
+    last_message = state["messages"][-1].content
+    emails_text = _email_context()
+    chain = _chain.get()
+
+    try:
+        if chain is None:
+            raise RuntimeError("No LLM configured")
+        response = await chain.ainvoke({
+            "input": last_message,
+            "emails": emails_text
+        })
+    except Exception as e:
+        logger.error(f"Email agent failed to generate response: {e}")
+        response = "I encountered an error trying to process your email request."
+
+    return {
+        "output": response,
+        "next_node": "FINISH"
+    }
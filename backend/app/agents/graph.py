@@ -1,9 +1,13 @@
+import threading
+import time
+
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 from app.agents.state import AgentState
 from app.agents.supervisor import get_supervisor_node
 
-from app.agents.memory_agent import memory_agent_node
-from app.agents.email_agent import email_agent_node
+from app.agents.memory_agent import memory_agent_node, amemory_agent_node
+from app.agents.email_agent import email_agent_node, aemail_agent_node
 
 def build_workflow():
     """Builds the LangGraph orchestration workflow."""
@@ -12,8 +16,10 @@ def build_workflow():
 
     # 2. Add all our nodes (the agents)
     workflow.add_node("supervisor", get_supervisor_node())
-    workflow.add_node("memory", memory_agent_node)
-    workflow.add_node("email", email_agent_node)
+    # Each node has a sync and an async implementation; agent_app.ainvoke()
+    # runs the async ones so no threadpool worker waits on the LLM
+    workflow.add_node("memory", RunnableLambda(memory_agent_node, afunc=amemory_agent_node, name="memory"))
+    workflow.add_node("email", RunnableLambda(email_agent_node, afunc=aemail_agent_node, name="email"))
 
     # 3. Define the routing logic 
     # The supervisor decides where to go next based on its output
@@ -39,5 +45,65 @@ def build_workflow():
     # 5. Compile the graph into a runnable application
     return workflow.compile()
 
-# Global graph instance
-agent_app = build_workflow()
+# Global graph instance, compiled on first use. Nodes resolve the LLM per
+# call (see agents/chains.py), so the compiled graph never needs rebuilding
+# when the LLM is configured or swapped after startup.
+_agent_app = None
+_agent_app_lock = threading.Lock()
+
+
+def get_agent_app():
+    """Get the compiled agent graph (built once per process)."""
+    global _agent_app
+
+    if _agent_app is None:
+        with _agent_app_lock:
+            if _agent_app is None:
+                _agent_app = build_workflow()
+    return _agent_app
+
+
+def benchmark_agent_app(iterations: int = 300) -> dict:
+    """
+    Per-invocation overhead of the graph, excluding the model call: runs
+    the supervisor -> email path against an instant fake chat model.
+    """
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    from langchain_core.messages import HumanMessage
+
+    from app.core import llm as llm_module
+    from app.core.config import settings
+
+    # Swapped in for the run only; restored so a benchmark started inside
+    # the app process leaves its LLM and settings as they were
+    saved_llm = llm_module._llm_instance
+    saved_settings = {
+        name: getattr(settings, name)
+        for name in ("supervisor_fast_path_enabled", "llm_cache_enabled")
+    }
+    llm_module._llm_instance = FakeListChatModel(
+        responses=['{"next_node": "email", "reasoning": "benchmark"}', "answer"]
+    )
+    settings.supervisor_fast_path_enabled = False
+    settings.llm_cache_enabled = False
+
+    try:
+        app = get_agent_app()
+        state = lambda: {"messages": [HumanMessage(content="What is new?")], "memories": [], "current_email": None}
+        for _ in range(20):
+            app.invoke(state())
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            app.invoke(state())
+        elapsed = time.perf_counter() - started
+    finally:
+        llm_module._llm_instance = saved_llm
+        for name, value in saved_settings.items():
+            setattr(settings, name, value)
+
+    return {"iterations": iterations, "ms_per_invocation": round(elapsed / iterations * 1000, 3)}
+
+
+if __name__ == "__main__":
+    print(benchmark_agent_app())
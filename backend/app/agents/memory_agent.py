@@ -1,12 +1,23 @@
+import asyncio
 import logging
 from app.agents.state import AgentState
 from app.langchain.memory import search_memory, store_memory
-from app.core.llm import get_llm
+from app.agents.chains import LazyChain
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
 logger = logging.getLogger(__name__)
 
+MEMORY_AGENT_PROMPT = (
+    "You are an AI personal assistant. The user asked or said: '{input}'\n\n"
+    "Here is the context retrieved from your semantic memory:\n{context}\n\n"
+    "Respond to the user utilizing this context. Be helpful and concise."
+)
+
+_chain = LazyChain(
+    lambda llm: ChatPromptTemplate.from_template(MEMORY_AGENT_PROMPT) | llm | StrOutputParser()
+)
+
 def memory_agent_node(state: AgentState):
     """
     Handles memory search and storage for the LangGraph.
@@ -22,18 +33,13 @@ def memory_agent_node(state: AgentState):
         memories.extend(results)
     
     # 2. Use LLM to form a good response using the discovered memory
-    llm = get_llm()
-    prompt = ChatPromptTemplate.from_template(
-        "You are an AI personal assistant. The user asked or said: '{input}'\n\n"
-        "Here is the context retrieved from your semantic memory:\n{context}\n\n"
-        "Respond to the user utilizing this context. Be helpful and concise."
-    )
-    
     context_str = "\n".join(memories[-3:]) if memories else "No relevant past context found."
     
-    chain = prompt | llm | StrOutputParser()
+    chain = _chain.get()
     
     try:
+        if chain is None:
+            raise RuntimeError("No LLM configured")
         response = chain.invoke({
             "input": last_message,
             "context": context_str
@@ -47,3 +53,37 @@ def memory_agent_node(state: AgentState):
         "output": response,
         "next_node": "FINISH"
     }
+
+
+async def amemory_agent_node(state: AgentState):
+    """Async memory_agent_node (uses the chain's native ainvoke)."""
+    logger.info("--- MEMORY AGENT ---")
+
+    last_message = state["messages"][-1].content
+
+    # Vector search is synchronous; keep it off the event loop
+    results = await asyncio.to_thread(search_memory, last_message)
+    memories = state.get("memories", [])
+    if results:
+        memories.extend(results)
+
+    context_str = "\n".join(memories[-3:]) if memories else "No relevant past context found."
+
+    chain = _chain.get()
+
+    try:
+        if chain is None:
+            raise RuntimeError("No LLM configured")
+        response = await chain.ainvoke({
+            "input": last_message,
+            "context": context_str
+        })
+    except Exception as e:
+        logger.error(f"Memory agent failed to generate response: {e}")
+        response = "I encountered an error trying to process your request."
+
+    return {
+        "memories": memories,
+        "output": response,
+        "next_node": "FINISH"
+    }
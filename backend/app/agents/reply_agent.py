@@ -4,9 +4,11 @@ Generates AI-powered email replies with configurable tone.
 Uses semantic memory for context-aware responses.
 """
 
+import asyncio
 import logging
+from typing import AsyncIterator
 
-from app.core.llm import get_llm
+from app.core.llm import get_llm, invoke_llm, ainvoke_llm, astream_llm
 from app.core.prompts import REPLY_GENERATION_PROMPT
 from app.langchain.memory import search_memory
 
@@ -21,52 +23,162 @@ def generate_reply(
     subject: str,
     content: str,
     tone: str = "concise",
+    use_cache: bool = True,
 ) -> str:
     """
     Generate an AI email reply.
     Uses semantic memory to add context from past interactions.
     Falls back to template-based reply when no LLM is available.
+    Set use_cache=False to force a fresh draft.
     """
-    tone = tone.lower()
-    if tone not in ("concise", "formal", "direct"):
-        tone = "concise"
+    tone = _normalize_tone(tone)
+    reply = draft_reply(sender, subject, content, tone, use_cache=use_cache)
+    if reply is not None:
+        return reply
+
+    # Fallback to template-based reply
+    return _fallback_reply(sender, subject, content, tone)
+
+
+def draft_reply(
+    sender: str,
+    subject: str,
+    content: str,
+    tone: str = "concise",
+    use_cache: bool = True,
+) -> str | None:
+    """
+    LLM-only reply: None when no LLM is available or the call fails,
+    so callers can tell a real draft from the template fallback.
+    """
+    llm = get_llm(task="reply")
+    if llm is None:
+        return None
 
     # Retrieve relevant memory for context
     memory_context = _get_memory_context(sender, subject)
 
-    llm = get_llm()
+    try:
+        prompt = _reply_prompt(sender, subject, content, _normalize_tone(tone), memory_context)
+        response = invoke_llm(llm, prompt, cache=use_cache)
+        return _content_text(response.content).strip()
+    except Exception as e:
+        logger.error(f"LLM reply generation failed: {e}")
+        return None
+
+
+async def agenerate_reply(
+    sender: str,
+    subject: str,
+    content: str,
+    tone: str = "concise",
+    use_cache: bool = True,
+) -> str:
+    """Async generate_reply (uses the model's native ainvoke)."""
+    tone = _normalize_tone(tone)
+
+    # Vector search is synchronous; keep it off the event loop
+    memory_context = await asyncio.to_thread(_get_memory_context, sender, subject)
+
+    llm = get_llm(task="reply")
 
     if llm is not None:
         try:
-            prompt = REPLY_GENERATION_PROMPT.format(
-                user_name=USER_NAME,
-                tone=tone,
-                sender=sender,
-                subject=subject,
-                content=content,
-                memory_context=memory_context or "No relevant past context found.",
-            )
-            response = llm.invoke(prompt)
-            # Handle list-type content (Gemini returns this)
-            content_text = response.content
-            if isinstance(content_text, list):
-                parts = []
-                for block in content_text:
-                    if isinstance(block, str):
-                        parts.append(block)
-                    elif isinstance(block, dict) and "text" in block:
-                        parts.append(block["text"])
-                    else:
-                        parts.append(str(block))
-                content_text = "\n".join(parts)
-            return content_text.strip()
+            prompt = _reply_prompt(sender, subject, content, tone, memory_context)
+            response = await ainvoke_llm(llm, prompt, cache=use_cache)
+            return _content_text(response.content).strip()
         except Exception as e:
             logger.error(f"LLM reply generation failed: {e}")
 
-    # Fallback to template-based reply
     return _fallback_reply(sender, subject, content, tone)
 
 
+async def astream_reply(
+    sender: str,
+    subject: str,
+    content: str,
+    tone: str = "concise",
+    use_cache: bool = True,
+) -> AsyncIterator[str]:
+    """
+    Stream an AI email reply as text pieces, as the model produces them.
+    Falls back to the template reply (one piece) when no LLM is available
+    or the call fails before any text was produced.
+    """
+    tone = _normalize_tone(tone)
+    memory_context = await asyncio.to_thread(_get_memory_context, sender, subject)
+
+    llm = get_llm(task="reply")
+    started = False
+
+    if llm is not None:
+        try:
+            prompt = _reply_prompt(sender, subject, content, tone, memory_context)
+            async for piece in astream_llm(llm, prompt, cache=use_cache):
+                text = _chunk_text(piece)
+                if not started:
+                    text = text.lstrip()
+                if text:
+                    started = True
+                    yield text
+            if started:
+                return
+        except Exception as e:
+            if started:
+                # Part of the reply is already on the wire; let the caller report it
+                raise
+            logger.error(f"LLM reply streaming failed: {e}")
+
+    yield _fallback_reply(sender, subject, content, tone)
+
+
+def _normalize_tone(tone: str) -> str:
+    tone = tone.lower()
+    return tone if tone in ("concise", "formal", "direct") else "concise"
+
+
+def _reply_prompt(sender: str, subject: str, content: str, tone: str, memory_context: str) -> str:
+    return REPLY_GENERATION_PROMPT.format(
+        user_name=USER_NAME,
+        tone=tone,
+        sender=sender,
+        subject=subject,
+        content=content,
+        memory_context=memory_context or "No relevant past context found.",
+    )
+
+
+def _content_text(content) -> str:
+    """Flatten message content; Gemini returns a list of blocks."""
+    if not isinstance(content, list):
+        return content
+    parts = []
+    for block in content:
+        if isinstance(block, str):
+            parts.append(block)
+        elif isinstance(block, dict) and "text" in block:
+            parts.append(block["text"])
+        else:
+            parts.append(str(block))
+    return "\n".join(parts)
+
+
+def _chunk_text(content) -> str:
+    """
+    Text of one streamed chunk. Gemini streams lists of blocks; pieces of
+    one reply are concatenated as-is and thinking blocks are dropped.
+    """
+    if not isinstance(content, list):
+        return content or ""
+    parts = []
+    for block in content:
+        if isinstance(block, str):
+            parts.append(block)
+        elif isinstance(block, dict) and block.get("type") != "thinking":
+            parts.append(block.get("text", ""))
+    return "".join(parts)
+
+
 def _get_memory_context(sender: str, subject: str) -> str:
     """Search semantic memory for relevant context about sender/topic."""
     try:
@@ -0,0 +1,226 @@
+"""
+Local fast-path router for the supervisor.
+Decides between the 'memory' and 'email' nodes without an LLM call when
+the query is clearly routable:
+
+  1. keyword rules (sub-millisecond)
+  2. nearest-centroid over the embedding model already loaded for
+     semantic memory (one cached MiniLM query embedding)
+
+Returns None for ambiguous queries, which the supervisor LLM then routes.
+Run `python -m app.agents.router` for an accuracy/latency benchmark over
+the labelled query set below.
+"""
+
+import logging
+import re
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# ── Keyword Rules ──────────────────────────────────────────────────────
+
+_RULES = {
+    "email": re.compile(
+        r"\b(e-?mails?|inbox|unread|repl(y|ies)|respond|draft|sender|urgent|"
+        r"priorit(y|ies|ize)|follow[- ]?ups?|message from|cc|forward)\b",
+        re.IGNORECASE,
+    ),
+    "memory": re.compile(
+        r"\b(remember|recall|memor(y|ies)|remind me what|note that|keep in mind|"
+        r"last time|previously|earlier we|what did (i|we)|what do you know|don't forget)\b",
+        re.IGNORECASE,
+    ),
+}
+
+# ── Labelled Queries ───────────────────────────────────────────────────
+# Examples the centroids are built from (phrased without rule keywords
+# where possible, so the embedding tier covers what the rules miss).
+
+ROUTE_EXAMPLES = {
+    "email": [
+        "What does Sarah want from me today?",
+        "Anything important waiting for me?",
+        "Summarize what the investors sent",
+        "Which messages need an answer first?",
+        "Write back to Mike about the Series C timeline",
+        "Did HR send anything about performance reviews?",
+        "Who is waiting on me right now?",
+        "What's the most pressing thing in my mailbox?",
+    ],
+    "memory": [
+        "What do I know about David Park?",
+        "What did we decide about the Q1 roadmap?",
+        "Save the fact that Lisa prefers morning meetings",
+        "Have I talked to the board about hiring before?",
+        "What was the context of the marketing campaign discussion?",
+        "Store this: the board meeting moved to Thursday",
+        "What happened the last time we discussed the budget?",
+        "Tell me what you know about our Series B",
+    ],
+}
+
+# Held-out queries for the benchmark (None = genuinely ambiguous)
+ROUTER_EVAL_SET = [
+    ("Show me my unread emails", "email"),
+    ("Draft a reply to Sarah", "email"),
+    ("Which email is most urgent?", "email"),
+    ("Anything from the board I should look at?", "email"),
+    ("What did Mike ask for?", "email"),
+    ("Respond to Emily and confirm Friday", "email"),
+    ("Do I have messages from investors?", "email"),
+    ("Remember that I'm out next Tuesday", "memory"),
+    ("What do you remember about Lisa?", "memory"),
+    ("Recall what we agreed with David last week", "memory"),
+    ("What did we say about engineering capacity?", "memory"),
+    ("Note that the Series C lead is Acme Ventures", "memory"),
+    ("Who is Sarah Chen?", "memory"),
+    ("Hello!", None),
+    ("Thanks, that's all", None),
+]
+
+_centroids: Optional[dict[str, np.ndarray]] = None
+_centroids_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"rules": 0, "embedding": 0, "llm": 0, "seconds_total": 0.0}
+
+
+def route_by_rules(query: str) -> Optional[str]:
+    """Route on keywords when exactly one node's rules match."""
+    hits = [node for node, pattern in _RULES.items() if pattern.search(query)]
+    return hits[0] if len(hits) == 1 else None
+
+
+def _embeddings_ready():
+    """The shared embedding model, only if it's already loaded."""
+    from app.langchain.embeddings import embeddings_load_seconds, get_embeddings
+
+    # Never load the model on the request path just to save a routing call
+    if embeddings_load_seconds() is None:
+        return None
+    return get_embeddings()
+
+
+def _get_centroids(embeddings) -> dict[str, np.ndarray]:
+    global _centroids
+
+    if _centroids is None:
+        with _centroids_lock:
+            if _centroids is None:
+                centroids = {}
+                for node, examples in ROUTE_EXAMPLES.items():
+                    vectors = _normalize(np.asarray(embeddings.embed_documents(examples), dtype=np.float32))
+                    centroids[node] = _normalize(vectors.mean(axis=0))
+                _centroids = centroids
+    return _centroids
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def route_by_embedding(query: str) -> Optional[str]:
+    """
+    Route to the nearest centroid when it's similar enough and clearly
+    ahead of the runner-up (supervisor_router_min_similarity / _margin).
+    """
+    embeddings = _embeddings_ready()
+    if embeddings is None:
+        return None
+
+    centroids = _get_centroids(embeddings)
+    query_vector = _normalize(np.asarray(embeddings.embed_query(query), dtype=np.float32))
+    scores = sorted(
+        ((float(query_vector @ centroid), node) for node, centroid in centroids.items()),
+        reverse=True,
+    )
+    (best, node), (runner_up, _) = scores[0], scores[1]
+    if best >= settings.supervisor_router_min_similarity and \
+            best - runner_up >= settings.supervisor_router_margin:
+        return node
+    return None
+
+
+def fast_route(query: str) -> Optional[str]:
+    """
+    Pick 'memory' or 'email' locally, or None to defer to the LLM.
+    Embedding failures are treated as "ambiguous", never as errors.
+    """
+    started = time.perf_counter()
+    tier = "rules"
+    node = route_by_rules(query)
+    if node is None:
+        tier = "embedding"
+        try:
+            node = route_by_embedding(query)
+        except Exception as e:
+            logger.warning(f"Embedding router failed: {e}")
+            node = None
+    if node is None:
+        tier = "llm"
+
+    with _stats_lock:
+        _stats[tier] += 1
+        _stats["seconds_total"] += time.perf_counter() - started
+    return node
+
+
+def get_router_stats() -> dict:
+    with _stats_lock:
+        routed = _stats["rules"] + _stats["embedding"] + _stats["llm"]
+        return {
+            "rules": _stats["rules"],
+            "embedding": _stats["embedding"],
+            "deferred_to_llm": _stats["llm"],
+            "avg_local_ms": round(_stats["seconds_total"] / routed * 1000, 3) if routed else None,
+        }
+
+
+def benchmark_router(eval_set=ROUTER_EVAL_SET) -> dict:
+    """
+    Accuracy and local latency of the fast path over a labelled set.
+    A deferral is "correct" for ambiguous (None) labels; otherwise only
+    the matching node is.
+    """
+    results = {"rules": [], "embedding": [], "llm": []}
+    correct = 0
+    for query, expected in eval_set:
+        started = time.perf_counter()
+        tier, node = "rules", route_by_rules(query)
+        if node is None:
+            tier, node = "embedding", route_by_embedding(query)
+        if node is None:
+            tier = "llm"
+        results[tier].append((time.perf_counter() - started) * 1000)
+        correct += node == expected
+        logger.debug(f"{query!r}: {node} via {tier} (expected {expected})")
+
+    return {
+        "queries": len(eval_set),
+        "accuracy": round(correct / len(eval_set), 3),
+        "tiers": {
+            tier: {
+                "count": len(ms),
+                "p50_ms": round(float(np.percentile(ms, 50)), 3) if ms else None,
+                "max_ms": round(max(ms), 3) if ms else None,
+            }
+            for tier, ms in results.items()
+        },
+    }
+
+
+if __name__ == "__main__":
+    import json
+
+    from app.langchain.embeddings import get_embeddings
+
+    get_embeddings()  # load the model first, as the app's startup preload does
+    route_by_embedding("warm up")
+    print(json.dumps(benchmark_router(), indent=2))
@@ -1,12 +1,16 @@
+import asyncio
 import logging
 from typing import List, Literal
 
 from langchain_core.messages import HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.runnables import RunnableLambda
 from pydantic import BaseModel, Field
 
-from app.core.llm import get_llm
+from app.core.config import settings
+from app.agents.chains import LazyChain
+from app.agents.router import fast_route
 from app.agents.state import AgentState
 
 logger = logging.getLogger(__name__)
@@ -19,48 +23,91 @@ class RouterOutput(BaseModel):
     )
     reasoning: str = Field(description="Brief reasoning for the decision")
 
+
+SUPERVISOR_SYSTEM_PROMPT = (
+    "You are an orchestrator overseeing a personal AI assistant (MemAG).\n"
+    "Your job is to route the incoming request to the correct agent node.\n\n"
+    "Nodes available:\n"
+    "1. 'memory': For tasks involving searching past information, retrieving context, or storing new facts.\n"
+    "2. 'email': For tasks involving analyzing emails, generating replies, or calculating priority.\n\n"
+    "If the request is complete and no more actions are needed, return 'FINISH'.\n"
+    "Always respond in JSON with 'next_node' and 'reasoning'."
+)
+
+# Built once; the chain itself is composed when an LLM is first available
+_prompt = ChatPromptTemplate.from_messages([
+    ("system", SUPERVISOR_SYSTEM_PROMPT),
+    MessagesPlaceholder(variable_name="messages"),
+    ("human", "Decide the next step for the request: {input}")
+])
+_parser = JsonOutputParser(pydantic_object=RouterOutput)
+_chain = LazyChain(lambda llm: _prompt | llm | _parser, task="supervisor")
+
+
+def _fast_path(last_message: str) -> dict | None:
+    # Clearly routable queries skip the LLM hop entirely
+    if settings.supervisor_fast_path_enabled:
+        node = fast_route(last_message)
+        if node is not None:
+            logger.info(f"Supervisor fast path: {node}")
+            return {"next_node": node}
+    return None
+
+
+def _routing_chain():
+    chain = _chain.get()
+    if chain is None:
+        raise RuntimeError("No LLM configured")
+    return chain
+
+
+def supervisor(state: AgentState):
+    last_message = state["messages"][-1].content
+
+    fast = _fast_path(last_message)
+    if fast is not None:
+        return fast
+
+    try:
+        result = _routing_chain().invoke({
+            "messages": state["messages"],
+            "input": last_message
+        })
+
+        logger.info(f"Supervisor decided: {result['next_node']} (Reason: {result['reasoning']})")
+        return {"next_node": result["next_node"]}
+    except Exception as e:
+        logger.error(f"Supervisor routing failed: {e}")
+        # Fallback
+        return {"next_node": "FINISH"}
+
+
+async def asupervisor(state: AgentState):
+    last_message = state["messages"][-1].content
+
+    # The embedding tier runs MiniLM (and builds centroids on first use)
+    fast = await asyncio.to_thread(_fast_path, last_message)
+    if fast is not None:
+        return fast
+
+    try:
+        result = await _routing_chain().ainvoke({
+            "messages": state["messages"],
+            "input": last_message
+        })
+
+        logger.info(f"Supervisor decided: {result['next_node']} (Reason: {result['reasoning']})")
+        return {"next_node": result["next_node"]}
+    except Exception as e:
+        logger.error(f"Supervisor routing failed: {e}")
+        return {"next_node": "FINISH"}
+
+
 def get_supervisor_node():
     """
     Creates the supervisor node that routes to worker agents.
+    The LLM is resolved per call, so the node works even if the LLM is
+    configured after the graph was built.
     """
-    llm = get_llm()
-    
-    system_prompt = (
-        "You are an orchestrator overseeing a personal AI assistant (MemAG).\n"
-        "Your job is to route the incoming request to the correct agent node.\n\n"
-        "Nodes available:\n"
-        "1. 'memory': For tasks involving searching past information, retrieving context, or storing new facts.\n"
-        "2. 'email': For tasks involving analyzing emails, generating replies, or calculating priority.\n\n"
-        "If the request is complete and no more actions are needed, return 'FINISH'.\n"
-        "Always respond in JSON with 'next_node' and 'reasoning'."
-    )
-
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
-        MessagesPlaceholder(variable_name="messages"),
-        ("human", "Decide the next step for the request: {input}")
-    ])
-
-    # In a real LangGraph setup, we'd bind the output parser or use function calling
-    # For now, we'll implement the node's core logic
-    def supervisor(state: AgentState):
-        last_message = state["messages"][-1].content
-        
-        # Simple manual routing logic or LLM call
-        # Let's use the LLM to decide
-        chain = prompt | llm | JsonOutputParser(pydantic_object=RouterOutput)
-        
-        try:
-            result = chain.invoke({
-                "messages": state["messages"],
-                "input": last_message
-            })
-            
-            logger.info(f"Supervisor decided: {result['next_node']} (Reason: {result['reasoning']})")
-            return {"next_node": result["next_node"]}
-        except Exception as e:
-            logger.error(f"Supervisor routing failed: {e}")
-            # Fallback
-            return {"next_node": "FINISH"}
-
-    return supervisor
+    # Sync and async entry points; graph.ainvoke() uses the async one
+    return RunnableLambda(supervisor, afunc=asupervisor, name="supervisor")
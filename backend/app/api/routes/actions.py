@@ -9,6 +9,7 @@ from app.api.schemas.action_schema import PriorityEmailItem, PriorityExplanation
 from app.api.schemas.summary_schema import DashboardSummary
 from app.services.priority_service import score_all_emails, get_priority_explanation
 from app.services.summary_service import generate_dashboard_summary
+from app.services.draft_service import schedule_reply_drafts
 from app.services.email_service import get_all_emails
 
 router = APIRouter()
@@ -21,6 +22,8 @@ def get_priority_scores():
     Powers the Priority Engine page.
     """
     scored = score_all_emails()
+    # Re-rank background reply drafts (drops jobs for emails that fell out of the top-K)
+    schedule_reply_drafts()
     return [
         PriorityEmailItem(
             id=e["id"],
@@ -65,12 +68,12 @@ class AgentRequest(BaseModel):
     query: str
 
 @router.post("/agent/invoke")
-def invoke_agent(request: AgentRequest):
+async def invoke_agent(request: AgentRequest):
     """
     Invokes the Phase 3 LangGraph orchestrator.
     The supervisor will route the query to either the memory or email agent.
     """
-    from app.agents.graph import agent_app
+    from app.agents.graph import get_agent_app
     from langchain_core.messages import HumanMessage
     
     # 1. Provide the initial input state
@@ -80,8 +83,8 @@ def invoke_agent(request: AgentRequest):
         "current_email": None
     }
     
-    # 2. Run the graph compilation to completion
-    result = agent_app.invoke(initial_state)
+    # 2. Run the graph compilation to completion (async nodes end to end)
+    result = await get_agent_app().ainvoke(initial_state)
     
     # 3. Return the decisions and outputs from the state
     return {
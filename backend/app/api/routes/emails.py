@@ -4,27 +4,41 @@ Handles email processing, retrieval, AI summaries, and reply generation.
 """
 
 import asyncio
+import base64
+import json
 import logging
+import time
+from typing import Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 
 from app.api.schemas.email_schema import (
     EmailProcessInput,
+    EmailBatchInput,
+    EmailBatchItemResult,
+    EmailBatchResponse,
     EmailResponse,
     EmailListItem,
     ReplyRequest,
     ReplyResponse,
     AISummary,
 )
+from app.core.config import settings
 from app.services.email_service import (
     process_email,
-    get_all_emails,
+    process_emails,
     get_email_by_id,
+    list_emails_page,
     update_email,
+    batched_writes,
 )
-from app.services.summary_service import generate_email_summary
-from app.services.priority_service import score_email
-from app.agents.reply_agent import generate_reply
+from app.services.deadlines import DEADLINE_BUCKETS
+from app.services.summary_service import agenerate_email_summary, generate_email_summaries
+from app.services.priority_service import ascore_email, score_emails, priority_updates
+from app.services.draft_service import get_precomputed_reply, schedule_reply_drafts
+from app.services.enrichment_service import enqueue_enrichment, get_enrichment_status
+from app.agents.reply_agent import agenerate_reply, astream_reply
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -35,6 +49,8 @@ async def process_new_email(data: EmailProcessInput):
     """
     Process a new incoming email.
     Stores it, generates AI summary, and calculates priority score.
+    With the task queue enabled, returns right after storing and enriches
+    in the background; poll GET /emails/{id}/status for completion.
     """
     # Store the email (fast, no LLM involved)
     email = process_email(
@@ -44,55 +60,178 @@ async def process_new_email(data: EmailProcessInput):
         deadline=data.deadline,
         email_type=data.type,
         sender_email=data.sender_email,
+        store_in_memory=not settings.task_queue_enabled,
     )
 
-    # Run AI summary + priority scoring CONCURRENTLY (both are LLM calls)
-    summary_task = asyncio.to_thread(
-        generate_email_summary,
-        sender=data.sender,
-        subject=data.subject,
-        content=data.content,
-    )
-    score_task = asyncio.to_thread(score_email, email)
+    if settings.task_queue_enabled:
+        enqueue_enrichment(email["id"])
+        return {"status": "queued", "email": get_email_by_id(email["id"])}
 
-    summary, scores = await asyncio.gather(summary_task, score_task)
+    # Run AI summary + priority scoring CONCURRENTLY (both are native
+    # async LLM calls, so no threadpool worker is held while they run)
+    summary, scores = await asyncio.gather(
+        agenerate_email_summary(
+            sender=data.sender,
+            subject=data.subject,
+            content=data.content,
+        ),
+        ascore_email(email),
+    )
 
     # Apply results
     update_email(email["id"], {
         "ai_summary": summary,
-        "urgency": scores["total_score"],
+        **priority_updates(scores),
     })
 
+    # Speculatively draft replies if this email made the top-K
+    schedule_reply_drafts()
+
     # Return updated email
     updated = get_email_by_id(email["id"])
     return {"status": "processed", "email": updated}
 
 
-@router.get("/", response_model=list[EmailListItem])
-def list_emails():
+@router.post("/process/batch", response_model=EmailBatchResponse)
+async def process_email_batch(data: EmailBatchInput):
+    """
+    Process many emails in one request.
+    Stores them in a single write and embeds them in one batch, then runs
+    AI summary + priority scoring in packed multi-email LLM calls with
+    bounded concurrency.
+    """
+    # Store + batch embedding is CPU-bound; keep it off the event loop
+    emails = await asyncio.to_thread(process_emails, [
+        {
+            "sender": item.sender,
+            "subject": item.subject,
+            "content": item.content,
+            "deadline": item.deadline,
+            "email_type": item.type,
+            "sender_email": item.sender_email,
+        }
+        for item in data.emails
+    ])
+
+    if not data.enrich:
+        results = [
+            EmailBatchItemResult(index=i, id=email["id"], status="stored")
+            for i, email in enumerate(emails)
+        ]
+        return EmailBatchResponse(total=len(results), processed=0, failed=0, results=results)
+
+    semaphore = asyncio.Semaphore(settings.batch_enrichment_concurrency)
+    chunk_size = max(1, settings.llm_batch_size)
+
+    async def enrich(start: int, chunk: list[dict]) -> list[EmailBatchItemResult]:
+        # Each chunk is summarised and scored with one packed LLM call apiece
+        async with semaphore:
+            try:
+                summaries, all_scores = await asyncio.gather(
+                    asyncio.to_thread(generate_email_summaries, chunk),
+                    asyncio.to_thread(score_emails, chunk),
+                )
+            except Exception as e:
+                # The emails themselves are already stored; only enrichment failed
+                logger.error(f"Batch enrichment failed for emails {chunk[0]['id']}-{chunk[-1]['id']}: {e}")
+                return [
+                    EmailBatchItemResult(index=start + i, id=email["id"], status="failed", error=str(e))
+                    for i, email in enumerate(chunk)
+                ]
+
+            with batched_writes():
+                for email, summary, scores in zip(chunk, summaries, all_scores):
+                    update_email(email["id"], {
+                        "ai_summary": summary,
+                        **priority_updates(scores),
+                    })
+            return [
+                EmailBatchItemResult(
+                    index=start + i, id=email["id"], status="processed",
+                    urgency=scores["total_score"],
+                )
+                for i, (email, scores) in enumerate(zip(chunk, all_scores))
+            ]
+
+    chunk_results = await asyncio.gather(*(
+        enrich(i, emails[i:i + chunk_size]) for i in range(0, len(emails), chunk_size)
+    ))
+    results = [r for chunk in chunk_results for r in chunk]
+    processed = sum(1 for r in results if r.status == "processed")
+    if processed:
+        schedule_reply_drafts()
+    return EmailBatchResponse(
+        total=len(results),
+        processed=processed,
+        failed=len(results) - processed,
+        results=results,
+    )
+
+
+LIST_FIELDS = ("sender", "subject", "urgency", "deadline", "type", "preview")
+LIST_FIELD_DEFAULTS = {"urgency": 0, "deadline": "No deadline", "type": "Email", "preview": ""}
+
+
+@router.get("/", response_model=list[EmailListItem], response_model_exclude_unset=True)
+def list_emails(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size (default: all emails)"),
+    after: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    type: Optional[str] = Query(None, description="Only emails of this type, e.g. 'Meeting request'"),
+    sender: Optional[str] = Query(None, description="Sender name or address (case-insensitive)"),
+    deadline: Optional[str] = Query(None, description=f"Deadline bucket: {', '.join(DEADLINE_BUCKETS)}"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (id is always included)"),
+):
     """
-    Get all emails for the Priority Inbox.
-    Returns emails sorted by urgency score (highest first).
+    Get emails for the Priority Inbox.
+    Returns emails sorted by urgency score (highest first), a page at a
+    time when `limit` is given. When more emails follow, the cursor for
+    the next page is returned in the X-Next-Cursor header.
     """
-    emails = get_all_emails()
+    if deadline is not None and deadline not in DEADLINE_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Unknown deadline bucket: {deadline}")
+    projection = LIST_FIELDS
+    if fields:
+        projection = tuple(f.strip() for f in fields.split(",") if f.strip() and f.strip() != "id")
+        unknown = set(projection) - set(LIST_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
 
-    # Sort by urgency descending
-    emails.sort(key=lambda e: e.get("urgency", 0), reverse=True)
+    # One extra row tells us whether there's a next page
+    emails = list_emails_page(
+        limit=limit + 1 if limit else None,
+        after=_decode_cursor(after) if after else None,
+        email_type=type,
+        sender=sender,
+        deadline=deadline,
+    )
+    if limit and len(emails) > limit:
+        emails = emails[:limit]
+        last = emails[-1]
+        response.headers["X-Next-Cursor"] = _encode_cursor(int(last.get("urgency", 0) or 0), last["id"])
 
     return [
         EmailListItem(
             id=e["id"],
-            sender=e["sender"],
-            subject=e["subject"],
-            urgency=e.get("urgency", 0),
-            deadline=e.get("deadline", "No deadline"),
-            type=e.get("type", "Email"),
-            preview=e.get("preview", ""),
+            **{f: e.get(f, LIST_FIELD_DEFAULTS.get(f)) for f in projection},
         )
         for e in emails
     ]
 
 
+def _encode_cursor(urgency: int, email_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{urgency}:{email_id}".encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[int, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        urgency, email_id = raw.split(":", 1)
+        return int(urgency), email_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/{email_id}", response_model=EmailResponse)
 def get_email(email_id: str):
     """
@@ -112,6 +251,7 @@ def get_email(email_id: str):
         time=email.get("time", ""),
         urgency=email.get("urgency", 0),
         deadline=email.get("deadline", "No deadline"),
+        deadline_at=email.get("deadline_at"),
         type=email.get("type", "Email"),
         content=email.get("content", ""),
         preview=email.get("preview", ""),
@@ -123,8 +263,29 @@ def get_email(email_id: str):
     )
 
 
+@router.get("/{email_id}/status")
+async def get_email_status(
+    email_id: str,
+    wait: float = Query(0, ge=0, le=30, description="Long-poll: seconds to wait for completion"),
+):
+    """
+    Background enrichment status for an email: queued, running, retrying,
+    done or failed. With `wait`, holds the request until the status is
+    final or the timeout passes.
+    """
+    status = get_enrichment_status(email_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Email not found")
+
+    deadline = time.monotonic() + wait
+    while status["status"] not in ("done", "failed") and time.monotonic() < deadline:
+        await asyncio.sleep(0.25)
+        status = get_enrichment_status(email_id) or status
+    return status
+
+
 @router.post("/{email_id}/reply", response_model=ReplyResponse)
-def generate_email_reply(email_id: str, data: ReplyRequest):
+async def generate_email_reply(email_id: str, data: ReplyRequest):
     """
     Generate an AI reply for a specific email.
     Supports tones: concise, formal, direct.
@@ -133,7 +294,12 @@ def generate_email_reply(email_id: str, data: ReplyRequest):
     if not email:
         raise HTTPException(status_code=404, detail="Email not found")
 
-    reply_text = generate_reply(
+    # Served instantly when a background draft exists for this content
+    reply_text = get_precomputed_reply(email, data.tone)
+    if reply_text is not None:
+        return ReplyResponse(reply_text=reply_text, tone=data.tone)
+
+    reply_text = await agenerate_reply(
         sender=email["sender"],
         subject=email["subject"],
         content=email.get("content", ""),
@@ -143,17 +309,79 @@ def generate_email_reply(email_id: str, data: ReplyRequest):
     return ReplyResponse(reply_text=reply_text, tone=data.tone)
 
 
+@router.post("/{email_id}/reply/stream")
+async def stream_email_reply(email_id: str, data: ReplyRequest):
+    """
+    Stream an AI reply as Server-Sent Events.
+    Emits `token` events ({"text": ...}) as the model produces them, then a
+    `done` event with the full reply and time-to-first-token, or an `error`
+    event if generation fails midway.
+    """
+    email = get_email_by_id(email_id)
+    if not email:
+        raise HTTPException(status_code=404, detail="Email not found")
+
+    precomputed = get_precomputed_reply(email, data.tone)
+
+    async def precomputed_reply():
+        yield precomputed
+
+    async def events():
+        started = time.perf_counter()
+        ttft = None
+        parts = []
+        try:
+            pieces = precomputed_reply() if precomputed is not None else astream_reply(
+                sender=email["sender"],
+                subject=email["subject"],
+                content=email.get("content", ""),
+                tone=data.tone,
+            )
+            async for text in pieces:
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                parts.append(text)
+                yield _sse("token", {"text": text})
+        except Exception as e:
+            logger.error(f"Reply stream for email {email_id} failed: {e}")
+            yield _sse("error", {"detail": "Reply generation failed"})
+            return
+
+        total = time.perf_counter() - started
+        logger.info(
+            f"Reply stream for email {email_id}: ttft={ttft or 0:.3f}s total={total:.3f}s"
+        )
+        yield _sse("done", {
+            "reply_text": "".join(parts).strip(),
+            "tone": data.tone,
+            "ttft_ms": round((ttft or 0) * 1000),
+            "total_ms": round(total * 1000),
+        })
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @router.post("/{email_id}/summarize")
-def summarize_email(email_id: str):
+async def summarize_email(email_id: str):
     """Re-generate AI summary for an email."""
     email = get_email_by_id(email_id)
     if not email:
         raise HTTPException(status_code=404, detail="Email not found")
 
-    summary = generate_email_summary(
+    # Explicit re-generation: bypass the LLM response cache
+    summary = await agenerate_email_summary(
         sender=email["sender"],
         subject=email["subject"],
         content=email.get("content", ""),
+        use_cache=False,
     )
     update_email(email_id, {"ai_summary": summary})
 
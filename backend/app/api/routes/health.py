@@ -1,4 +1,11 @@
 from fastapi import APIRouter
+from app.agents.router import get_router_stats
+from app.core.config import settings
+from app.core.llm import get_llm_stats
+from app.core.task_queue import get_task_queue
+from app.services.deadline_service import get_deadline_stats
+from app.services.draft_service import get_draft_stats
+from app.services.email_service import get_storage_stats
 
 router = APIRouter()
 
@@ -8,4 +15,20 @@ def health():
     return {
         "status": "ok",
         "service": "MemAG backend"
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/llm")
+def llm_stats():
+    return {
+        **get_llm_stats(),
+        "reply_drafts": get_draft_stats(),
+        # Don't create the queue DB just to report on a disabled queue
+        "task_queue": get_task_queue().get_stats() if settings.task_queue_enabled else None,
+        "supervisor_router": get_router_stats(),
+    }
+
+
+@router.get("/storage")
+def storage_stats():
+    return {**get_storage_stats(), "deadline_rescoring": get_deadline_stats()}
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 from app.langchain.memory import store_memory, search_memory
+from app.langchain.vector_store import get_vector_store_stats
 
 router = APIRouter()
 
@@ -20,4 +21,9 @@ def store(data: MemoryInput):
 
 @router.post("/search")
 def search(data: MemoryQuery):
-    return search_memory(data.query)
\ No newline at end of file
+    return search_memory(data.query)
+
+
+@router.get("/stats")
+def stats():
+    return get_vector_store_stats()
@@ -19,6 +19,12 @@ class EmailProcessInput(BaseModel):
     type: Optional[str] = Field(None, description="Email type override")
 
 
+class EmailBatchInput(BaseModel):
+    """Input for bulk email ingestion (imports, historical backfills)."""
+    emails: list[EmailProcessInput] = Field(..., min_length=1)
+    enrich: bool = Field(default=True, description="Generate AI summary and priority score per email")
+
+
 class ReplyRequest(BaseModel):
     """Input for generating an AI reply."""
     tone: str = Field(default="concise", description="Reply tone: concise, formal, or direct")
@@ -47,6 +53,7 @@ class EmailResponse(BaseModel):
     time: str
     urgency: int
     deadline: str
+    deadline_at: Optional[str] = None  # parsed absolute deadline (ISO), if recognised
     type: str
     content: str
     preview: str
@@ -55,14 +62,32 @@ class EmailResponse(BaseModel):
 
 
 class EmailListItem(BaseModel):
-    """Email item for the Dashboard Priority Inbox."""
+    """Email item for the Dashboard Priority Inbox.
+    Fields left out by a `fields` projection are omitted from the response."""
     id: str
-    sender: str
-    subject: str
-    urgency: int
-    deadline: str
-    type: str
-    preview: str
+    sender: Optional[str] = None
+    subject: Optional[str] = None
+    urgency: Optional[int] = None
+    deadline: Optional[str] = None
+    type: Optional[str] = None
+    preview: Optional[str] = None
+
+
+class EmailBatchItemResult(BaseModel):
+    """Outcome for one email in a batch, in input order."""
+    index: int
+    id: str
+    status: str                 # processed | stored | failed
+    urgency: int = 0
+    error: Optional[str] = None
+
+
+class EmailBatchResponse(BaseModel):
+    """Bulk ingestion response with per-item status."""
+    total: int
+    processed: int
+    failed: int
+    results: list[EmailBatchItemResult]
 
 
 class ReplyResponse(BaseModel):
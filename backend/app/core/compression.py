@@ -0,0 +1,99 @@
+"""
+Compression and content-defined chunking for stored email bodies.
+
+- compress()/decompress() wrap zstd (when `zstandard` is installed) or
+  zlib. Every blob starts with a one-byte codec tag, so rows written
+  under one codec stay readable after email_body_compression changes.
+- split_chunks() cuts text at paragraph breaks, so quoted replies,
+  signatures and disclaimers that recur across emails produce identical
+  chunks that the store can keep once, keyed by chunk_hash().
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import zlib
+from typing import Optional
+
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is always available
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+_RAW, _ZLIB, _ZSTD = 0, 1, 2
+_CODEC_TAGS = {"none": _RAW, "zlib": _ZLIB, "zstd": _ZSTD}
+
+_PARAGRAPH_BREAK = re.compile(r"(?<=\n\n)|(?<=\n\r\n)")
+
+_codec: Optional[str] = None
+_local = threading.local()  # zstd (de)compressor objects aren't thread-safe
+
+
+def codec_name() -> str:
+    """The codec new blobs are written with."""
+    global _codec
+
+    if _codec is None:
+        codec = settings.email_body_compression
+        if codec not in _CODEC_TAGS:
+            raise ValueError(f"Unknown email body compression: {codec}")
+        if codec == "zstd" and zstandard is None:
+            logger.info("zstandard not installed; compressing email bodies with zlib")
+            codec = "zlib"
+        _codec = codec
+    return _codec
+
+
+def compress(data: bytes) -> bytes:
+    codec = codec_name()
+    if codec == "zstd":
+        packed = bytes([_ZSTD]) + _zstd_compressor().compress(data)
+    elif codec == "zlib":
+        packed = bytes([_ZLIB]) + zlib.compress(data)
+    else:
+        packed = None
+
+    # Short chunks can grow when compressed; keep them raw then
+    if packed is None or len(packed) > len(data):
+        return bytes([_RAW]) + data
+    return packed
+
+
+def decompress(blob: bytes) -> bytes:
+    tag, payload = blob[0], blob[1:]
+    if tag == _RAW:
+        return payload
+    elif tag == _ZLIB:
+        return zlib.decompress(payload)
+    elif tag == _ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstd-compressed email body found but zstandard is not installed")
+        return _zstd_decompressor().decompress(payload)
+    else:
+        raise ValueError(f"Unknown compression tag: {tag}")
+
+
+def _zstd_compressor():
+    if getattr(_local, "compressor", None) is None:
+        _local.compressor = zstandard.ZstdCompressor()
+    return _local.compressor
+
+
+def _zstd_decompressor():
+    if getattr(_local, "decompressor", None) is None:
+        _local.decompressor = zstandard.ZstdDecompressor()
+    return _local.decompressor
+
+
+def split_chunks(text: str) -> list[str]:
+    """Split text after each blank line; "".join() restores it exactly."""
+    return [chunk for chunk in _PARAGRAPH_BREAK.split(text) if chunk]
+
+
+def chunk_hash(chunk: str) -> bytes:
+    return hashlib.blake2b(chunk.encode("utf-8"), digest_size=16).digest()
@@ -32,8 +32,52 @@ class Settings(BaseSettings):
 
     default_llm_provider: str = "nvidia"
 
+    # LLM response cache (keyed by provider + model + prompt)
+    llm_cache_enabled: bool = True
+    llm_cache_ttl_seconds: int = 86400
+    llm_cache_max_entries: int = 10000
+    llm_single_flight_enabled: bool = True  # share one call between identical concurrent prompts
+
+    # ── Per-Task Model Profiles ─────────────────────────────────────────
+    # Model used by get_llm(task=...): "<provider>:<model>" or just "<model>"
+    # (on the default provider). Empty = the default LLM.
+    # e.g. LLM_MODEL_PRIORITY=gemini:gemini-2.0-flash-lite
+    llm_model_supervisor: str = ""
+    llm_model_priority: str = ""
+    llm_model_summary: str = ""
+    llm_model_reply: str = ""
+    llm_model_dashboard: str = ""
+
+    # ── Supervisor Fast Path ────────────────────────────────────────────
+    # Keyword + embedding-centroid routing before the supervisor LLM call
+    supervisor_fast_path_enabled: bool = True
+    supervisor_router_min_similarity: float = 0.35
+    supervisor_router_margin: float = 0.08
+
+    # ── LLM HTTP Transport ──────────────────────────────────────────────
+    llm_http_max_connections: int = 20
+    llm_http_max_keepalive_connections: int = 10
+    llm_http_keepalive_seconds: float = 60.0
+    llm_http2: bool = True  # needs the h2 package; falls back to HTTP/1.1
+    llm_connect_timeout_seconds: float = 5.0
+    llm_request_timeout_seconds: float = 60.0
+    llm_max_retries: int = 2
+
+    # Per-provider request budgets (0 = unlimited). Defaults follow the
+    # Gemini / NVIDIA free tiers.
+    openai_requests_per_minute: int = 0
+    anthropic_requests_per_minute: int = 0
+    gemini_requests_per_minute: int = 15
+    nvidia_requests_per_minute: int = 40
+    llm_rate_limit_burst: int = 5
+    llm_rate_limit_max_wait_seconds: float = 10  # then fall back to rules
+
     # ── Embedding Configuration ────────────────────────────────────────
     embedding_model: str = "all-MiniLM-L6-v2"
+    preload_embeddings: bool = True  # warm the model in a background thread at startup
+    embedding_cache_enabled: bool = True
+    embedding_cache_dir: Optional[str] = None  # defaults to <data_dir>/embedding_cache
+    embedding_cache_lru_size: int = 10000  # vectors kept in memory
 
     # ── Vector DB Configuration ────────────────────────────────────────
     vector_db_path: str = "./chroma_db"
@@ -52,6 +96,11 @@ class Settings(BaseSettings):
 
     # ── Data Storage ───────────────────────────────────────────────────
     data_dir: str = "./data"
+    email_store_backend: str = "sqlite"  # sqlite or json
+    email_cache_flush_interval: float = 0  # seconds; 0 = write-through
+    email_body_cache_size: int = 256  # email bodies kept in memory (LRU)
+    email_body_compression: str = "zstd"  # zstd (zlib if zstandard isn't installed), zlib or none
+    deadline_rescore_interval: float = 60  # seconds between deadline-bucket checks; 0 = off
 
     # ── API ─────────────────────────────────────────────────────────────
     cors_origins: str = "http://localhost:3000,http://localhost:5173,http://localhost:8000"
@@ -60,6 +109,27 @@ class Settings(BaseSettings):
     agent_max_iterations: int = 10
     agent_timeout_seconds: int = 300
 
+    # ── Batch Processing ────────────────────────────────────────────────
+    batch_enrichment_concurrency: int = 8  # concurrent summary/scoring jobs
+    priority_scoring_concurrency: int = 4  # LLM scoring threads in score_all_emails
+    llm_batch_size: int = 10  # emails packed per scoring/summary LLM call (1 = off)
+
+    # ── Reply Drafts ────────────────────────────────────────────────────
+    # Drafts in every tone are generated in the background for the most
+    # urgent emails and served instantly by the reply endpoints
+    reply_drafts_enabled: bool = True
+    reply_drafts_top_k: int = 5
+    reply_drafts_workers: int = 1  # keep low: drafts share the LLM rate limit
+
+    # ── Task Queue ──────────────────────────────────────────────────────
+    # Post-ingest enrichment (summary, AI urgency, memory) runs on a durable
+    # SQLite-backed queue instead of inside the /emails/process request
+    task_queue_enabled: bool = True
+    task_queue_workers: int = 2
+    task_queue_max_attempts: int = 5
+    task_queue_retry_base_seconds: float = 2.0
+    task_queue_retry_max_seconds: float = 300.0
+
     model_config = {
         "env_file": ".env",
         "env_file_encoding": "utf-8",
@@ -70,13 +140,17 @@ class Settings(BaseSettings):
     @property
     def has_llm(self) -> bool:
         """Check if any LLM API key is configured."""
-        if self.default_llm_provider == "openai":
+        return self.has_llm_for(self.default_llm_provider)
+
+    def has_llm_for(self, provider: str) -> bool:
+        """Check if an API key is configured for `provider`."""
+        if provider == "openai":
             return bool(self.openai_api_key)
-        elif self.default_llm_provider == "anthropic":
+        elif provider == "anthropic":
             return bool(self.anthropic_api_key)
-        elif self.default_llm_provider == "gemini":
+        elif provider == "gemini":
             return bool(self.google_api_key)
-        elif self.default_llm_provider == "nvidia":
+        elif provider == "nvidia":
             return bool(self.nvidia_api_key)
         return False
 
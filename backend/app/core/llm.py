@@ -2,24 +2,50 @@
 LLM provider initialization.
 Returns a configured ChatModel based on the settings.
 Falls back gracefully when no API key is configured.
+Also provides invoke_llm(), which fronts model calls with a persistent
+response cache and coalesces identical concurrent calls.
 """
 
+import asyncio
+import hashlib
+import json
 import logging
-from typing import Optional
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
 from app.core.config import settings
+from app.core.rate_limit import acquire_llm_slot, aacquire_llm_slot, get_rate_limit_stats
 
 logger = logging.getLogger(__name__)
 
 _llm_instance = None
 
+LLM_TASKS = ("supervisor", "priority", "summary", "reply", "dashboard")
+LLM_PROVIDERS = ("openai", "anthropic", "gemini", "nvidia")
 
-def get_llm():
+_task_llms: dict[str, object] = {}  # "<provider>:<model>" -> client
+_task_llms_lock = threading.Lock()
+
+
+def get_llm(task: Optional[str] = None):
     """
     Get the configured LLM instance.
     Returns None if no API key is configured.
+
+    With `task` (one of LLM_TASKS), returns the model configured in that
+    task's LLM_MODEL_<TASK> profile, so cheap, latency-critical tasks can
+    use a small model. Tasks without a profile, or whose model can't be
+    created, use the default LLM.
     """
     global _llm_instance
 
+    if task is not None:
+        llm = _get_task_llm(task)
+        if llm is not None:
+            return llm
+
     if _llm_instance is not None:
         return _llm_instance
 
@@ -30,73 +56,544 @@ def get_llm():
         )
         return None
 
+    _llm_instance = create_llm()
+    return _llm_instance
+
+
+def _parse_model_spec(spec: str) -> tuple[str, str]:
+    """Split "<provider>:<model>" (the provider prefix is optional)."""
+    provider, sep, model = spec.partition(":")
+    if sep and provider in LLM_PROVIDERS:
+        return provider, model
+    return settings.default_llm_provider, spec
+
+
+def _get_task_llm(task: str):
+    spec = getattr(settings, f"llm_model_{task}", "").strip()
+    if not spec:
+        return None
+
+    provider, model = _parse_model_spec(spec)
+    key = f"{provider}:{model}"
+    if key in _task_llms:
+        return _task_llms[key]
+
+    with _task_llms_lock:
+        if key not in _task_llms:
+            llm = None
+            if settings.has_llm_for(provider):
+                llm = create_llm(provider, model)
+            else:
+                logger.warning(f"No API key for {provider}; '{task}' task uses the default LLM")
+            # Cache failures too, so a bad profile doesn't retry on every call
+            _task_llms[key] = llm
+        return _task_llms[key]
+
+
+def create_llm(
+    provider: Optional[str] = None,
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+):
+    """
+    Build a new chat model for `provider` (default: DEFAULT_LLM_PROVIDER).
+    Unset arguments come from the provider's settings. Every instance gets
+    its own HTTP connection pool, so e.g. a cheap scoring model and a strong
+    reply model don't compete for connections. Returns None on failure.
+    """
+    provider = provider or settings.default_llm_provider
+
     try:
-        if settings.default_llm_provider == "openai":
+        if provider == "openai":
             from langchain_openai import ChatOpenAI
 
-            _llm_instance = ChatOpenAI(
-                model=settings.openai_model,
-                temperature=settings.openai_temperature,
-                max_tokens=settings.openai_max_tokens,
+            model = model or settings.openai_model
+            http_client, http_async_client = _http_clients(f"openai:{model}")
+            llm = ChatOpenAI(
+                model=model,
+                temperature=settings.openai_temperature if temperature is None else temperature,
+                max_tokens=max_tokens or settings.openai_max_tokens,
                 api_key=settings.openai_api_key,
+                http_client=http_client,
+                http_async_client=http_async_client,
+                timeout=_request_timeout(),
+                max_retries=settings.llm_max_retries,
             )
-            logger.info(f"LLM initialized: OpenAI ({settings.openai_model})")
 
-        elif settings.default_llm_provider == "anthropic":
+        elif provider == "anthropic":
             from langchain_anthropic import ChatAnthropic
 
-            _llm_instance = ChatAnthropic(
-                model=settings.anthropic_model,
+            model = model or settings.anthropic_model
+            llm = ChatAnthropic(
+                model=model,
                 api_key=settings.anthropic_api_key,
+                **_supported(ChatAnthropic, {
+                    "temperature": temperature,
+                    "max_tokens": max_tokens,
+                    "default_request_timeout": settings.llm_request_timeout_seconds,
+                    "max_retries": settings.llm_max_retries,
+                }),
             )
-            logger.info(f"LLM initialized: Anthropic ({settings.anthropic_model})")
 
-        elif settings.default_llm_provider == "gemini":
+        elif provider == "gemini":
             from langchain_google_genai import ChatGoogleGenerativeAI
 
-            _llm_instance = ChatGoogleGenerativeAI(
-                model=settings.gemini_model,
-                temperature=settings.gemini_temperature,
-                max_output_tokens=settings.gemini_max_tokens,
+            model = model or settings.gemini_model
+            llm = ChatGoogleGenerativeAI(
+                model=model,
+                temperature=settings.gemini_temperature if temperature is None else temperature,
+                max_output_tokens=max_tokens or settings.gemini_max_tokens,
                 google_api_key=settings.google_api_key,
-                max_retries=2,
-                timeout=30,
+                max_retries=settings.llm_max_retries,
+                timeout=settings.llm_request_timeout_seconds,
+                # google-genai based releases pass these through to httpx
+                **_supported(ChatGoogleGenerativeAI, {"client_args": _pool_options()}),
             )
-            logger.info(f"LLM initialized: Gemini ({settings.gemini_model})")
 
-        elif settings.default_llm_provider == "nvidia":
+        elif provider == "nvidia":
             from langchain_nvidia_ai_endpoints import ChatNVIDIA
 
-            _llm_instance = ChatNVIDIA(
-                model=settings.nvidia_model,
+            model = model or settings.nvidia_model
+            llm = ChatNVIDIA(
+                model=model,
                 api_key=settings.nvidia_api_key,
-                temperature=settings.nvidia_temperature,
-                max_tokens=settings.nvidia_max_tokens,
+                temperature=settings.nvidia_temperature if temperature is None else temperature,
+                max_tokens=max_tokens or settings.nvidia_max_tokens,
+                **_supported(ChatNVIDIA, {
+                    "timeout": settings.llm_request_timeout_seconds,
+                    "max_retries": settings.llm_max_retries,
+                }),
             )
-            logger.info(f"LLM initialized: NVIDIA ({settings.nvidia_model})")
 
         else:
-            logger.error(f"Unknown LLM provider: {settings.default_llm_provider}")
+            logger.error(f"Unknown LLM provider: {provider}")
             return None
 
     except Exception as e:
         logger.error(f"Failed to initialize LLM: {e}")
         return None
 
-    return _llm_instance
+    logger.info(f"LLM initialized: {provider} ({model})")
+    return llm
 
 
-def parse_llm_json_response(response) -> dict:
+# ── HTTP Transport ─────────────────────────────────────────────────────
+# Provider SDKs default to a fresh transport per client with conservative
+# pool limits. Clients we build get explicitly sized keep-alive pools
+# (HTTP/2 when the h2 package is installed) from the LLM_HTTP_* settings.
+
+_http_pools: dict[str, tuple] = {}
+_http_pools_lock = threading.Lock()
+
+
+def _http2_available() -> bool:
+    if not settings.llm_http2:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("LLM_HTTP2 is enabled but the h2 package is missing; using HTTP/1.1")
+        return False
+
+
+def _request_timeout():
+    import httpx
+
+    return httpx.Timeout(
+        settings.llm_request_timeout_seconds,
+        connect=settings.llm_connect_timeout_seconds,
+    )
+
+
+def _pool_options() -> dict:
+    import httpx
+
+    return {
+        "limits": httpx.Limits(
+            max_connections=settings.llm_http_max_connections,
+            max_keepalive_connections=settings.llm_http_max_keepalive_connections,
+            keepalive_expiry=settings.llm_http_keepalive_seconds,
+        ),
+        "http2": _http2_available(),
+    }
+
+
+def _http_clients(name: str) -> tuple:
+    """Sync and async httpx clients with their own pool, one pair per name."""
+    import httpx
+
+    with _http_pools_lock:
+        if name not in _http_pools:
+            options = _pool_options()
+            _http_pools[name] = (
+                httpx.Client(timeout=_request_timeout(), **options),
+                httpx.AsyncClient(timeout=_request_timeout(), **options),
+            )
+        return _http_pools[name]
+
+
+def _supported(model_cls, options: dict) -> dict:
+    """Keep only the options this integration version accepts (and that are set)."""
+    fields = getattr(model_cls, "model_fields", {})
+    return {k: v for k, v in options.items() if v is not None and k in fields}
+
+
+async def close_llm_clients():
+    """Close the pooled HTTP connections (called on app shutdown)."""
+    with _http_pools_lock:
+        pools = list(_http_pools.values())
+        _http_pools.clear()
+    for client, async_client in pools:
+        client.close()
+        await async_client.aclose()
+
+
+# ── Response Cache ─────────────────────────────────────────────────────
+
+class LLMResponseCache:
+    """
+    Persistent LLM response cache keyed by provider + model + prompt.
+    Backed by SQLite so entries survive restarts and are shared between
+    workers; entries expire after `ttl` seconds and the least recently
+    used ones are evicted beyond `max_entries`.
+    """
+
+    # Seconds before a hit refreshes an entry's last_used again
+    TOUCH_INTERVAL = 60
+
+    def __init__(self, path: str, ttl: float, max_entries: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, content TEXT NOT NULL,"
+                " created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(llm, prompt) -> str:
+        model = getattr(llm, "model_name", None) or getattr(llm, "model", None) or ""
+        raw = json.dumps([type(llm).__name__, model, str(prompt)], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT content, created_at, last_used FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row and now - row[1] <= self.ttl:
+            # Recency only orders eviction, so a hot key needn't write on every hit
+            if now - row[2] > self.TOUCH_INTERVAL:
+                with conn:
+                    conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+            with self._stats_lock:
+                self.hits += 1
+            return json.loads(row[0])
+
+        with self._stats_lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, content):
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, content, created_at, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(content, ensure_ascii=False), now, now),
+            )
+            self._puts += 1
+            if self._puts % 100 == 0:
+                self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+        conn.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            " SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def get_stats(self) -> dict:
+        entries = self._conn().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "entries": entries,
+            }
+
+
+_response_cache: Optional[LLMResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[LLMResponseCache]:
+    """Get the shared LLM response cache (None when disabled)."""
+    global _response_cache
+
+    if not settings.llm_cache_enabled:
+        return None
+
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = LLMResponseCache(
+                    os.path.join(settings.data_dir, "llm_cache.db"),
+                    ttl=settings.llm_cache_ttl_seconds,
+                    max_entries=settings.llm_cache_max_entries,
+                )
+    return _response_cache
+
+
+# ── Request Coalescing ─────────────────────────────────────────────────
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical LLM calls: while a call for a key is in
+    flight, other callers with the same key wait for it and share its
+    result (or exception) instead of issuing their own request.
     """
-    Parse JSON from an LLM response, handling provider differences.
+
+    def __init__(self):
+        self.executed = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._flights: dict[str, _Flight] = {}
+        self._async_flights: dict[str, asyncio.Task] = {}
+
+    def do(self, key: str, fn: Callable):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    async def ado(self, key: str, afn: Callable):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            task = self._async_flights.get(key)
+            if task is None or task.get_loop() is not loop:
+                # The call runs as its own task, so cancelling whichever
+                # caller started it doesn't cancel it for everyone else
+                task = self._async_flights[key] = loop.create_task(afn())
+                task.add_done_callback(lambda t: self._forget_async(key, t))
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        # shield: a cancelled caller (leader or follower) only stops waiting
+        return await asyncio.shield(task)
+
+    def _forget_async(self, key: str, task: asyncio.Task):
+        with self._lock:
+            if self._async_flights.get(key) is task:
+                del self._async_flights[key]
+        # Every caller may have gone away; don't warn about an unread error
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._flights) + len(self._async_flights),
+            }
+
+
+_single_flight = SingleFlight()
+
+
+def _cache_get(response_cache: Optional[LLMResponseCache], key: str):
+    if response_cache is None:
+        return None
+    try:
+        cached = response_cache.get(key)
+    except Exception as e:
+        logger.warning(f"LLM response cache read failed: {e}")
+        return None
+    if cached is None:
+        return None
+    from langchain_core.messages import AIMessage
+    return AIMessage(content=cached)
+
+
+def _cache_put(response_cache: Optional[LLMResponseCache], key: str, response):
+    if response_cache is None:
+        return
+    try:
+        response_cache.put(key, response.content)
+    except Exception as e:
+        logger.warning(f"LLM response cache write failed: {e}")
+
+
+def invoke_llm(
+    llm,
+    prompt,
+    cache: bool = True,
+    validate: Optional[Callable] = None,
+):
+    """
+    Call llm.invoke(prompt) through the shared response cache.
+
+    cache=False opts a call site out (no read, no write). `validate` is
+    called with the response before it's cached; if it raises, the
+    response is not cached and the error propagates to the caller.
+    Uncached calls wait for the provider's rate limit and raise
+    LLMBudgetExhausted when it can't be met. Identical calls already in
+    flight are joined rather than repeated (llm_single_flight_enabled).
+    """
+    response_cache = get_response_cache() if cache else None
+    key = LLMResponseCache.make_key(llm, prompt)
+    cached = _cache_get(response_cache, key)
+    if cached is not None:
+        return cached
+
+    def call():
+        acquire_llm_slot(llm)
+        response = llm.invoke(prompt)
+        if validate is not None:
+            validate(response)
+        _cache_put(response_cache, key, response)
+        return response
+
+    if not settings.llm_single_flight_enabled:
+        return call()
+    return _single_flight.do(key, call)
+
+
+async def ainvoke_llm(
+    llm,
+    prompt,
+    cache: bool = True,
+    validate: Optional[Callable] = None,
+):
+    """
+    Async invoke_llm: same caching, rate limiting and coalescing, but the
+    model call uses llm.ainvoke so no thread is held while it's in flight.
+    """
+    response_cache = get_response_cache() if cache else None
+    key = LLMResponseCache.make_key(llm, prompt)
+    cached = _cache_get(response_cache, key)
+    if cached is not None:
+        return cached
+
+    async def call():
+        await aacquire_llm_slot(llm)
+        response = await llm.ainvoke(prompt)
+        if validate is not None:
+            validate(response)
+        _cache_put(response_cache, key, response)
+        return response
+
+    if not settings.llm_single_flight_enabled:
+        return await call()
+    return await _single_flight.ado(key, call)
+
+
+async def astream_llm(llm, prompt, cache: bool = True):
+    """
+    Stream a completion via llm.astream, yielding each chunk's raw content
+    (a string, or a list of blocks for Gemini). A cached response is
+    yielded as a single chunk; a completed stream is written to the cache.
+    """
+    response_cache = get_response_cache() if cache else None
+    key = LLMResponseCache.make_key(llm, prompt) if response_cache else None
+    if response_cache is not None:
+        try:
+            cached = response_cache.get(key)
+        except Exception as e:
+            logger.warning(f"LLM response cache read failed: {e}")
+            cached = None
+        if cached is not None:
+            yield cached
+            return
+
+    await aacquire_llm_slot(llm)
+    full = None
+    async for chunk in llm.astream(prompt):
+        full = chunk if full is None else full + chunk
+        yield chunk.content
+
+    if response_cache is not None and full is not None:
+        try:
+            response_cache.put(key, full.content)
+        except Exception as e:
+            logger.warning(f"LLM response cache write failed: {e}")
+
+
+def get_llm_stats() -> dict:
+    """Runtime counters for the LLM layer."""
+    response_cache = get_response_cache()
+    return {
+        "response_cache": response_cache.get_stats() if response_cache else None,
+        "rate_limits": get_rate_limit_stats(),
+        "single_flight": _single_flight.get_stats(),
+    }
+
+
+def _llm_json_text(response) -> str:
+    """
+    Extract the JSON text from an LLM response, handling provider differences.
 
     Handles:
     - Gemini 2.5 thinking models (content blocks with 'type' fields)
     - Gemini returning content as a list of dicts/strings
     - Markdown code fences (```json ... ```)
-    - JSON embedded within extra text
     """
-    import json
     import re
 
     content = response.content
@@ -130,7 +627,17 @@ def parse_llm_json_response(response) -> dict:
     content = content.strip()
     content = re.sub(r"^```(?:json)?\s*\n?", "", content)
     content = re.sub(r"\n?```\s*$", "", content)
-    content = content.strip()
+    return content.strip()
+
+
+def parse_llm_json_response(response) -> dict:
+    """
+    Parse a JSON object from an LLM response, handling provider differences
+    (see _llm_json_text) and JSON embedded within extra text.
+    """
+    import re
+
+    content = _llm_json_text(response)
 
     # Try direct JSON parse first
     try:
@@ -147,3 +654,120 @@ def parse_llm_json_response(response) -> dict:
             pass
 
     raise ValueError(f"Could not extract JSON from LLM response: {content[:300]}")
+
+
+def parse_llm_json_list_response(response, key: str = "id") -> dict[str, dict]:
+    """
+    Parse a JSON array of objects from a batched (multi-item) LLM response.
+    Returns the items keyed by `key`; entries that aren't objects or lack
+    the key are dropped so callers can retry just those items.
+    Also accepts the array wrapped in an object (e.g. {"results": [...]}).
+    """
+    content = _llm_json_text(response)
+
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        # Fallback: take the outermost [...] span from the text
+        start, end = content.find("["), content.rfind("]")
+        if start == -1 or end <= start:
+            raise ValueError(f"Could not extract JSON array from LLM response: {content[:300]}")
+        try:
+            data = json.loads(content[start:end + 1])
+        except json.JSONDecodeError:
+            raise ValueError(f"Could not extract JSON array from LLM response: {content[:300]}")
+
+    if isinstance(data, dict):
+        data = next((v for v in data.values() if isinstance(v, list)), [data])
+    if not isinstance(data, list):
+        raise ValueError(f"Expected a JSON array from LLM, got {type(data).__name__}")
+
+    return {
+        str(item[key]): item
+        for item in data
+        if isinstance(item, dict) and item.get(key) is not None
+    }
+
+
+# ── Load Test ──────────────────────────────────────────────────────────
+
+def load_test_async_llm(calls: int = 500, latency: float = 0.2) -> dict:
+    """
+    Fire `calls` concurrent LLM calls at a fake chat model that answers
+    after `latency` seconds, once as threaded invoke_llm calls (the old
+    asyncio.to_thread path) and once as native ainvoke_llm calls, and
+    report wall-clock and the peak number of calls in flight for each.
+    The response cache and provider rate limit are off for the run.
+    """
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    from app.core.rate_limit import provider_of, reset_rate_limiters
+
+    in_flight = {"now": 0, "peak": 0}
+    in_flight_lock = threading.Lock()
+
+    def enter():
+        with in_flight_lock:
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+
+    def leave():
+        with in_flight_lock:
+            in_flight["now"] -= 1
+
+    class _FakeChatModel(FakeListChatModel):
+        # FakeListChatModel's async path runs the blocking one in a thread
+        def _call(self, *args, **kwargs) -> str:
+            enter()
+            try:
+                return super()._call(*args, **kwargs)
+            finally:
+                leave()
+
+        async def _agenerate(self, *args, **kwargs) -> ChatResult:
+            enter()
+            try:
+                await asyncio.sleep(self.sleep)
+            finally:
+                leave()
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.responses[0]))])
+
+    fake = _FakeChatModel(responses=["ok"], sleep=latency)
+    prompts = [f"Summarise email #{i}" for i in range(calls)]
+
+    async def threaded():
+        await asyncio.gather(*(asyncio.to_thread(invoke_llm, fake, p) for p in prompts))
+
+    async def native():
+        await asyncio.gather(*(ainvoke_llm(fake, p) for p in prompts))
+
+    rate_setting = f"{provider_of(fake)}_requests_per_minute"
+    saved_settings = {name: getattr(settings, name) for name in ("llm_cache_enabled", rate_setting)}
+    settings.llm_cache_enabled = False
+    setattr(settings, rate_setting, 0)
+    reset_rate_limiters()
+
+    results = {}
+    try:
+        for name, run in (("to_thread", threaded), ("ainvoke", native)):
+            in_flight["peak"] = 0
+            started = time.perf_counter()
+            asyncio.run(run())
+            elapsed = time.perf_counter() - started
+            results[name] = {
+                "seconds": round(elapsed, 2),
+                "calls_per_second": round(calls / elapsed, 1),
+                "peak_in_flight": in_flight["peak"],
+            }
+    finally:
+        for name, value in saved_settings.items():
+            setattr(settings, name, value)
+        reset_rate_limiters()
+
+    return {"calls": calls, "latency_seconds": latency, **results}
+
+
+if __name__ == "__main__":
+    print(json.dumps(load_test_async_llm(), indent=2))
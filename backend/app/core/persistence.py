@@ -0,0 +1,196 @@
+"""
+Crash-safe JSON file persistence shared by the file-backed services.
+
+- Writes go to a temp file in the same directory, are fsync'd, then
+  atomically swapped in with os.replace, so readers never observe a
+  truncated or half-written file.
+- file_lock() serializes read-modify-write cycles across threads and
+  worker processes via an advisory lock on a sidecar `.lock` file.
+- IdSequence hands out monotonic record IDs without scanning the data.
+"""
+
+import json
+import os
+import logging
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_thread_locks: dict[str, threading.RLock] = {}
+_held: dict[str, int] = {}  # nesting depth, only touched by the lock owner
+_thread_locks_guard = threading.Lock()
+
+
+def _thread_lock(path: str) -> threading.RLock:
+    with _thread_locks_guard:
+        return _thread_locks.setdefault(path, threading.RLock())
+
+
+@contextmanager
+def file_lock(path: str):
+    """
+    Hold an exclusive lock for `path` for the duration of the block.
+    Re-entrant within a thread; blocks other threads and processes.
+    """
+    path = os.path.abspath(path)
+    with _thread_lock(path):
+        # flock() conflicts across file descriptors even within one
+        # process, so only the outermost block takes the OS-level lock
+        if fcntl is None or _held.get(path):
+            _held[path] = _held.get(path, 0) + 1
+            try:
+                yield
+            finally:
+                _held[path] -= 1
+            return
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            _held[path] = 1
+            try:
+                yield
+            finally:
+                _held[path] = 0
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def read_json(path: str, default: Any) -> Any:
+    """Load JSON from `path`, returning `default` if the file doesn't exist."""
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def atomic_write_json(path: str, data: Any, indent: int | None = 2):
+    """Write JSON to `path` atomically (temp file + fsync + os.replace)."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    # Persist the rename itself (no-op where directories can't be opened)
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+class IdSequence:
+    """
+    Persisted monotonic ID sequence, stored next to its data file as
+    `<data file>.seq`. Allocation is O(1) and safe across threads and
+    worker processes. `initial` is called once, when the sequence file
+    doesn't exist yet, to return the highest ID already in use.
+    """
+
+    def __init__(self, data_path: str, initial: Callable[[], int] = lambda: 0):
+        self.path = data_path + ".seq"
+        self._initial = initial
+
+    def allocate(self, count: int = 1) -> range:
+        """Reserve `count` consecutive IDs and return them."""
+        if count < 1:
+            return range(0)
+
+        with file_lock(self.path):
+            state = read_json(self.path, None)
+            last = state["last"] if state else int(self._initial())
+            atomic_write_json(self.path, {"last": last + count}, indent=None)
+
+        return range(last + 1, last + count + 1)
+
+
+def stress_persistence(threads: int = 16, requests_per_thread: int = 50) -> dict:
+    """
+    Hammer POST /emails/process and POST /schedule/create from `threads`
+    threads at once, then check that no write was lost: every request
+    succeeded, IDs are unique and the stores hold every record.
+    Enrichment is left queued so only the storage path is measured.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from fastapi.testclient import TestClient
+
+    from app.core.config import settings
+    from app.main import app
+    from app.services.email_service import flush_emails
+    from app.services.email_store import get_email_store
+    from app.services.schedule_service import get_all_events
+
+    settings.task_queue_enabled = True
+    client = TestClient(app)
+    emails_before = get_email_store().count()
+    events_before = len(get_all_events())
+
+    def hammer(worker: int) -> list[tuple[str, int, str, float]]:
+        results = []
+        for i in range(requests_per_thread):
+            started = time.perf_counter()
+            if i % 2:
+                response = client.post("/schedule/create", json={
+                    "title": f"Stress {worker}-{i}", "start_time": "09:00", "end_time": "10:00",
+                })
+                kind, record_id = "event", response.json().get("id")
+            else:
+                response = client.post("/emails/process", json={
+                    "sender": f"Stress {worker}", "subject": f"Stress {worker}-{i}",
+                    "content": "Concurrent write check.",
+                })
+                kind, record_id = "email", response.json().get("email", {}).get("id")
+            results.append((kind, response.status_code, record_id, time.perf_counter() - started))
+        return results
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = [r for batch in pool.map(hammer, range(threads)) for r in batch]
+    elapsed = time.perf_counter() - started
+
+    flush_emails()
+    ids = {kind: [r[2] for r in results if r[0] == kind] for kind in ("email", "event")}
+    latencies = sorted(r[3] for r in results)
+    return {
+        "requests": len(results),
+        "seconds": round(elapsed, 2),
+        "requests_per_second": round(len(results) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 1),
+        "errors": sum(r[1] != 200 for r in results),
+        "duplicate_ids": sum(len(v) - len(set(v)) for v in ids.values()),
+        "emails_lost": len(ids["email"]) - (get_email_store().count() - emails_before),
+        "events_lost": len(ids["event"]) - (len(get_all_events()) - events_before),
+    }
+
+
+if __name__ == "__main__":
+    # Writes stress records, so always run against a scratch data directory
+    os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="memag-stress-")
+    print(json.dumps(stress_persistence(), indent=2))
@@ -31,6 +31,30 @@ Respond in this exact JSON format:
 """
 
 
+# ── Batched Email Summary Prompt ───────────────────────────────────────
+# Packs several emails into one request; {emails} is a JSON array of
+# {"id", "from", "subject", "content"} objects.
+EMAIL_SUMMARY_BATCH_PROMPT = """You are an AI executive assistant analyzing emails for a busy professional.
+
+For EACH email below provide:
+1. A list of 2-4 key points (most important information)
+2. A list of 2-3 suggested actions the user should take
+
+Emails (JSON):
+{emails}
+
+Respond with ONLY a JSON array containing one object per email, using the
+email's "id" exactly as given:
+[
+    {{
+        "id": "<email id>",
+        "key_points": ["point 1", "point 2"],
+        "suggested_actions": ["action 1", "action 2"]
+    }}
+]
+"""
+
+
 # ── Priority Scoring Prompt ────────────────────────────────────────────
 PRIORITY_SCORING_PROMPT = """You are an AI urgency analyzer for an executive's email inbox.
 
@@ -54,6 +78,34 @@ Respond in this exact JSON format:
 """
 
 
+# ── Batched Priority Scoring Prompt ────────────────────────────────────
+# Packs several emails into one request; {emails} is a JSON array of
+# {"id", "from", "subject", "deadline", "preview"} objects.
+PRIORITY_SCORING_BATCH_PROMPT = """You are an AI urgency analyzer for an executive's email inbox.
+
+Score the urgency of EACH email below from 0-20 based on:
+- Time sensitivity and explicit deadlines
+- Blocking issues or dependencies mentioned
+- Urgency signals in the language (ASAP, urgent, critical, etc.)
+- Impact if delayed
+
+Score each email independently.
+
+Emails (JSON):
+{emails}
+
+Respond with ONLY a JSON array containing one object per email, using the
+email's "id" exactly as given:
+[
+    {{
+        "id": "<email id>",
+        "ai_urgency_score": <number 0-20>,
+        "reasoning": "Brief explanation of urgency assessment"
+    }}
+]
+"""
+
+
 # ── Reply Generation Prompt ────────────────────────────────────────────
 REPLY_GENERATION_PROMPT = """You are an AI assistant drafting an email reply on behalf of {user_name}.
 
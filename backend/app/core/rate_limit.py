@@ -0,0 +1,140 @@
+"""
+Per-provider request rate limiting for LLM calls.
+Token buckets sized from Settings so free-tier quotas (e.g. Gemini, NVIDIA)
+are respected when many emails are scored concurrently.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBudgetExhausted(Exception):
+    """Raised when no request budget frees up within the allowed wait."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate_per_minute` sustained, `burst` max.
+    Callers reserve future tokens, so waiting threads are served in order
+    and a caller that would wait too long is rejected immediately.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.throttled = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """
+        Reserve one token. Returns how long to wait before using it
+        (0 if available now), or None if that would exceed `max_wait`.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            if wait > max_wait:
+                self.rejected += 1
+                return None
+            # May go negative: the deficit is owed by later callers
+            self.tokens -= 1
+            if wait:
+                self.throttled += 1
+            return wait
+
+    def acquire(self, timeout: float) -> bool:
+        """Block up to `timeout` seconds for a token. Returns False on timeout."""
+        wait = self.reserve(timeout)
+        if wait is None:
+            return False
+        if wait:
+            time.sleep(wait)
+        return True
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests_per_minute": round(self.rate * 60, 2),
+                "burst": self.capacity,
+                "throttled": self.throttled,
+                "rejected": self.rejected,
+            }
+
+
+# ── Provider Buckets ───────────────────────────────────────────────────
+
+_PROVIDER_CLASSES = {
+    "ChatOpenAI": "openai",
+    "ChatAnthropic": "anthropic",
+    "ChatGoogleGenerativeAI": "gemini",
+    "ChatNVIDIA": "nvidia",
+}
+
+_buckets: dict[str, Optional[TokenBucket]] = {}
+_buckets_lock = threading.Lock()
+
+
+def provider_of(llm) -> str:
+    """Map a chat model instance to its provider name."""
+    return _PROVIDER_CLASSES.get(type(llm).__name__, settings.default_llm_provider)
+
+
+def get_rate_limiter(provider: str) -> Optional[TokenBucket]:
+    """Get the shared bucket for `provider` (None when unlimited)."""
+    with _buckets_lock:
+        if provider not in _buckets:
+            rpm = getattr(settings, f"{provider}_requests_per_minute", 0)
+            _buckets[provider] = (
+                TokenBucket(rpm, settings.llm_rate_limit_burst) if rpm > 0 else None
+            )
+        return _buckets[provider]
+
+
+def reset_rate_limiters():
+    """Drop the buckets so they're rebuilt from the current settings."""
+    with _buckets_lock:
+        _buckets.clear()
+
+
+def acquire_llm_slot(llm):
+    """
+    Wait for request budget for `llm`'s provider.
+    Raises LLMBudgetExhausted if none frees up within
+    llm_rate_limit_max_wait_seconds, so callers can use their fallback.
+    """
+    provider = provider_of(llm)
+    bucket = get_rate_limiter(provider)
+    if bucket is None:
+        return
+    if not bucket.acquire(timeout=settings.llm_rate_limit_max_wait_seconds):
+        raise LLMBudgetExhausted(f"{provider} request budget exhausted")
+
+
+async def aacquire_llm_slot(llm):
+    """Async acquire_llm_slot: waits on the event loop instead of a thread."""
+    provider = provider_of(llm)
+    bucket = get_rate_limiter(provider)
+    if bucket is None:
+        return
+    wait = bucket.reserve(settings.llm_rate_limit_max_wait_seconds)
+    if wait is None:
+        raise LLMBudgetExhausted(f"{provider} request budget exhausted")
+    if wait:
+        await asyncio.sleep(wait)
+
+
+def get_rate_limit_stats() -> dict:
+    with _buckets_lock:
+        return {p: b.get_stats() for p, b in _buckets.items() if b is not None}
@@ -0,0 +1,235 @@
+"""
+Durable in-process task queue.
+Tasks are rows in a SQLite database (data_dir/tasks.db), so queued work
+survives restarts. Worker threads claim tasks with a lease: a task whose
+worker died is picked up again once its lease expires, and several app
+processes can share one queue. Failed tasks are retried with exponential
+backoff (plus jitter) up to task_queue_max_attempts.
+"""
+
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUEUE_FILE = os.path.join(settings.data_dir, "tasks.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind         TEXT NOT NULL,
+    key          TEXT,
+    payload      TEXT NOT NULL,
+    status       TEXT NOT NULL DEFAULT 'queued',
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    run_at       REAL NOT NULL,
+    lease_until  REAL,
+    last_error   TEXT,
+    created_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_ready ON tasks (status, run_at);
+-- At most one live task per key (enqueueing twice is a no-op)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_live_key
+    ON tasks (key) WHERE status IN ('queued', 'running');
+"""
+
+# handler(payload, attempt, last_attempt); raising schedules a retry
+TaskHandler = Callable[[dict, int, bool], None]
+
+_handlers: dict[str, TaskHandler] = {}
+
+
+def register_task_handler(kind: str, handler: TaskHandler):
+    """Register the function that runs tasks of `kind` (at import time)."""
+    _handlers[kind] = handler
+
+
+class TaskQueue:
+    """SQLite-backed work queue with lease-based claiming and retries."""
+
+    def __init__(self, path: str = QUEUE_FILE, lease_seconds: float = 300):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._workers: list[threading.Thread] = []
+        self._stats = {"completed": 0, "retried": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, kind: str, payload: dict, key: Optional[str] = None) -> bool:
+        """
+        Add a task. With `key`, a task already queued or running under the
+        same key makes this a no-op. Returns True if a task was added.
+        """
+        now = time.time()
+        with self._conn() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO tasks (kind, key, payload, run_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (kind, key, json.dumps(payload), now, now),
+            )
+        self._wakeup.set()
+        return cursor.rowcount > 0
+
+    # ── Workers ──
+
+    def start(self, workers: int):
+        """Start `workers` daemon threads (idempotent)."""
+        if self._workers:
+            return
+        self._stopping.clear()
+        for i in range(max(1, workers)):
+            thread = threading.Thread(target=self._work, name=f"task-worker-{i}", daemon=True)
+            thread.start()
+            self._workers.append(thread)
+        logger.info(f"Task queue started: {len(self._workers)} workers ({self.path})")
+
+    def stop(self, timeout: float = 5):
+        """Stop workers after their current task. Unfinished tasks stay queued."""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._workers:
+            thread.join(timeout)
+        self._workers = []
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                task = self._claim()
+                idle = self._idle_wait() if task is None else 0
+            except Exception as e:
+                # A locked or failing DB must not kill the worker; retry in 1s
+                logger.error(f"Task queue claim failed: {e}")
+                task, idle = None, 1.0
+
+            if task is None:
+                # Sleep until enqueue() signals, a retry comes due, or 1s passes
+                self._wakeup.wait(idle)
+                self._wakeup.clear()
+                continue
+            self._run(*task)
+
+    def _idle_wait(self) -> float:
+        row = self._conn().execute(
+            "SELECT MIN(run_at) FROM tasks WHERE status = 'queued'"
+        ).fetchone()
+        if row[0] is None:
+            return 1.0
+        return min(1.0, max(0.05, row[0] - time.time()))
+
+    def _claim(self) -> Optional[tuple]:
+        """Atomically take the next due task (or one with an expired lease)."""
+        conn = self._conn()
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, kind, payload, attempts FROM tasks "
+                "WHERE (status = 'queued' AND run_at <= ?) "
+                "   OR (status = 'running' AND lease_until < ?) "
+                "ORDER BY run_at LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE tasks SET status = 'running', attempts = attempts + 1, "
+                "lease_until = ? WHERE id = ?",
+                (now + self.lease_seconds, row[0]),
+            )
+        task_id, kind, payload, attempts = row
+        return task_id, kind, json.loads(payload), attempts + 1
+
+    def _run(self, task_id: int, kind: str, payload: dict, attempt: int):
+        last_attempt = attempt >= settings.task_queue_max_attempts
+        handler = _handlers.get(kind)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for task kind '{kind}'")
+            handler(payload, attempt, last_attempt)
+        except Exception as e:
+            self._failed(task_id, kind, attempt, last_attempt, e)
+            return
+
+        # Completed tasks are dropped; results live with the data they produce
+        with self._conn() as conn:
+            conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        self._count("completed")
+
+    def _failed(self, task_id: int, kind: str, attempt: int, last_attempt: bool, error: Exception):
+        with self._conn() as conn:
+            if last_attempt:
+                conn.execute(
+                    "UPDATE tasks SET status = 'failed', lease_until = NULL, last_error = ? "
+                    "WHERE id = ?",
+                    (str(error), task_id),
+                )
+            else:
+                delay = min(
+                    settings.task_queue_retry_max_seconds,
+                    settings.task_queue_retry_base_seconds * 2 ** (attempt - 1),
+                ) * random.uniform(0.5, 1.0)
+                conn.execute(
+                    "UPDATE tasks SET status = 'queued', lease_until = NULL, last_error = ?, "
+                    "run_at = ? WHERE id = ?",
+                    (str(error), time.time() + delay, task_id),
+                )
+
+        if last_attempt:
+            self._count("failed")
+            logger.error(f"Task {kind}#{task_id} failed after {attempt} attempts: {error}")
+        else:
+            self._count("retried")
+            logger.warning(f"Task {kind}#{task_id} attempt {attempt} failed, will retry: {error}")
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def get_stats(self) -> dict:
+        rows = self._conn().execute(
+            "SELECT status, COUNT(*) FROM tasks GROUP BY status"
+        ).fetchall()
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["workers"] = len(self._workers)
+        stats["backlog"] = {status: count for status, count in rows}
+        return stats
+
+
+# ── Shared Queue ───────────────────────────────────────────────────────
+
+_queue_instance: Optional[TaskQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_task_queue() -> TaskQueue:
+    """Get the process-wide task queue (created on first use)."""
+    global _queue_instance
+
+    if _queue_instance is None:
+        with _queue_lock:
+            if _queue_instance is None:
+                _queue_instance = TaskQueue()
+    return _queue_instance
@@ -1,7 +1,235 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
 from langchain_huggingface import HuggingFaceEmbeddings
 #from langchain_openai import OpenAIEmbeddings
+from app.core.config import settings
+from app.core.persistence import file_lock
+
+logger = logging.getLogger(__name__)
+
+_embeddings = None
+_embeddings_lock = threading.Lock()
+_load_seconds = None
+
 
 def get_embeddings():
-    return HuggingFaceEmbeddings(
-        model_name="all-MiniLM-L6-v2" #"text-embedding-3-small"
-    )
\ No newline at end of file
+    """
+    Shared embedding model. The sentence-transformer weights are loaded once
+    per process, on first use (or by the startup preload). Wrapped in a
+    content-hash cache unless EMBEDDING_CACHE_ENABLED is false.
+    """
+    global _embeddings, _load_seconds
+
+    if _embeddings is not None:
+        return _embeddings
+
+    with _embeddings_lock:
+        if _embeddings is None:
+            started = time.perf_counter()
+            model = HuggingFaceEmbeddings(
+                model_name=settings.embedding_model #"text-embedding-3-small"
+            )
+            if settings.embedding_cache_enabled:
+                model = CachedEmbeddings(model, settings.embedding_model)
+            _embeddings = model
+            _load_seconds = time.perf_counter() - started
+            logger.info(f"Embedding model loaded: {settings.embedding_model} ({_load_seconds:.2f}s)")
+
+    return _embeddings
+
+
+def embeddings_load_seconds():
+    return _load_seconds
+
+
+# ── Embedding Cache ────────────────────────────────────────────────────
+
+class _VectorFile:
+    """
+    Append-only on-disk vector cache: `<name>.f32` holds float32 rows and is
+    memory-mapped for reads, `<name>.idx` holds one "<content hash> <row>"
+    line per row. Appends take a file lock and pick up rows written by
+    other processes; vectors left without an index line by an interrupted
+    append are truncated away before the next one.
+    """
+
+    def __init__(self, directory: str, name: str):
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, re.sub(r"[^A-Za-z0-9_.-]", "_", name))
+        self.vectors_path = base + ".f32"
+        self.index_path = base + ".idx"
+        self.meta_path = base + ".meta.json"
+        self.dim: Optional[int] = None
+        self.rows: dict[str, int] = {}
+        self._next_row = 0  # first row not claimed by an index line
+        self._index_offset = 0
+        self._mmap = None
+        self._lock = threading.Lock()
+        self._read_meta()
+        self._sync_index()
+
+    def _read_meta(self):
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self.dim = json.load(f)["dim"]
+
+    def _sync_index(self):
+        """Read index lines appended since the last sync."""
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r", encoding="ascii") as f:
+            f.seek(self._index_offset)
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # partial line from an in-flight append
+                self._index_offset += len(line)
+                key, _, row = line.rstrip("\n").partition(" ")
+                if key in self.rows:
+                    continue  # duplicate line: first one wins, no new row
+                # Lines without a row number predate explicit offsets
+                row = int(row) if row else self._next_row
+                self.rows[key] = row
+                self._next_row = max(self._next_row, row + 1)
+
+    def _vector(self, row: int) -> list[float]:
+        if self._mmap is None or row >= self._mmap.shape[0]:
+            rows = os.path.getsize(self.vectors_path) // (4 * self.dim)
+            self._mmap = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        return self._mmap[row].tolist()
+
+    def get(self, key: str) -> Optional[list[float]]:
+        with self._lock:
+            row = self.rows.get(key)
+            if row is None and os.path.exists(self.index_path) \
+                    and os.path.getsize(self.index_path) != self._index_offset:
+                self._sync_index()
+                row = self.rows.get(key)
+            return self._vector(row) if row is not None else None
+
+    def put_many(self, items: list[tuple[str, list[float]]]):
+        if not items:
+            return
+        with self._lock, file_lock(self.index_path):
+            if self.dim is None:
+                self._read_meta()
+            if self.dim is None:
+                self.dim = len(items[0][1])
+                with open(self.meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"dim": self.dim}, f)
+
+            self._sync_index()
+            new = [(k, v) for k, v in dict(items).items() if k not in self.rows]
+            if not new:
+                return
+
+            # Vectors first, then the index, so an index row always has data.
+            # Drop orphan vectors from an append that died before its index
+            # write, so the new rows land at the offsets we record.
+            first = self._next_row
+            with open(self.vectors_path, "ab") as f:
+                if f.tell() != first * self.dim * 4:
+                    f.truncate(first * self.dim * 4)
+                    self._mmap = None
+                f.write(np.asarray([v for _, v in new], dtype=np.float32).tobytes())
+            with open(self.index_path, "a", encoding="ascii") as f:
+                f.write("".join(f"{k} {first + i}\n" for i, (k, _) in enumerate(new)))
+            self._sync_index()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Content-hash embedding cache in front of a real model: an in-memory LRU
+    backed by a memory-mapped vector file, so repeated texts and queries
+    never reach the transformer twice.
+    """
+
+    def __init__(self, model: Embeddings, model_name: str):
+        self.model = model
+        self.disk = _VectorFile(
+            settings.embedding_cache_dir or os.path.join(settings.data_dir, "embedding_cache"),
+            model_name,
+        )
+        self.lru: OrderedDict[str, list[float]] = OrderedDict()
+        self.lru_size = settings.embedding_cache_lru_size
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    @staticmethod
+    def _key(kind: str, text: str) -> str:
+        # Query and document embeddings can differ by model, so namespace them
+        return hashlib.sha256(f"{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[list[float]]:
+        with self._lock:
+            vector = self.lru.get(key)
+            if vector is not None:
+                self.lru.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return vector
+
+        vector = self.disk.get(key)
+        if vector is not None:
+            self._remember(key, vector)
+            with self._lock:
+                self.stats["disk_hits"] += 1
+        return vector
+
+    def _remember(self, key: str, vector: list[float]):
+        with self._lock:
+            self.lru[key] = vector
+            self.lru.move_to_end(key)
+            while len(self.lru) > self.lru_size:
+                self.lru.popitem(last=False)
+
+    def _embed(self, kind: str, texts: list[str], compute) -> list[list[float]]:
+        keys = [self._key(kind, t) for t in texts]
+        vectors = [self._lookup(k) for k in keys]
+
+        # First index of each distinct uncached text
+        missing = {keys[i]: i for i, v in reversed(list(enumerate(vectors))) if v is None}
+        if missing:
+            with self._lock:
+                self.stats["misses"] += len(missing)
+            computed = compute([texts[i] for i in missing.values()])
+            fresh = dict(zip(missing, computed))
+            for key, vector in fresh.items():
+                self._remember(key, vector)
+            vectors = [v if v is not None else fresh[k] for k, v in zip(keys, vectors)]
+            try:
+                self.disk.put_many(list(fresh.items()))
+            except Exception as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+
+        return vectors
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._embed("doc", texts, self.model.embed_documents)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed("query", [text], lambda t: [self.model.embed_query(t[0])])[0]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self.lru)
+        stats["disk_entries"] = len(self.disk.rows)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 3) if lookups else None
+        return stats
+
+
+def get_embedding_cache_stats() -> Optional[dict]:
+    """Hit/miss counters for the embedding cache (None until loaded/disabled)."""
+    if isinstance(_embeddings, CachedEmbeddings):
+        return _embeddings.get_stats()
+    return None
@@ -1,4 +1,6 @@
-from app.langchain.vector_store import get_vector_store
+import time
+
+from app.langchain.vector_store import get_vector_store, record_query
 
 
 def store_memory(text: str):
@@ -10,10 +12,21 @@ def store_memory(text: str):
     return {"status": "stored"}
 
 
+def store_memories(texts: list[str]):
+
+    vector_store = get_vector_store()
+
+    vector_store.add_texts(texts)
+
+    return {"status": "stored", "count": len(texts)}
+
+
 def search_memory(query: str):
 
     vector_store = get_vector_store()
 
+    started = time.perf_counter()
     docs = vector_store.similarity_search(query, k=3)
+    record_query(time.perf_counter() - started)
 
-    return [doc.page_content for doc in docs]
\ No newline at end of file
+    return [doc.page_content for doc in docs]
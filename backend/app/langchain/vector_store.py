@@ -1,15 +1,88 @@
+import logging
+import threading
+import time
+
 from langchain_chroma import Chroma
-from app.langchain.embeddings import get_embeddings
+from app.langchain.embeddings import (
+    get_embeddings,
+    embeddings_load_seconds,
+    get_embedding_cache_stats,
+)
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+_vector_store = None
+_vector_store_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {
+    "load_seconds": None,
+    "query_count": 0,
+    "query_seconds_total": 0.0,
+}
+
 
 def get_vector_store():
-    embeddings = get_embeddings()
+    """
+    Shared Chroma store (and embedding model) for the whole process.
+    Built once, thread-safe; later calls return the warm instance.
+    """
+    global _vector_store
+
+    if _vector_store is not None:
+        return _vector_store
+
+    with _vector_store_lock:
+        if _vector_store is None:
+            started = time.perf_counter()
+            embeddings = get_embeddings()
+
+            _vector_store = Chroma(
+                persist_directory=settings.vector_db_path,
+                embedding_function=embeddings,
+                collection_name=settings.vector_db_collection,
+            )
+            _stats["load_seconds"] = time.perf_counter() - started
+            logger.info(f"Vector store ready ({_stats['load_seconds']:.2f}s)")
+
+    return _vector_store
+
+
+def preload_vector_store(background: bool = True):
+    """Warm the embedding model and vector store, optionally off-thread."""
+
+    def _load():
+        try:
+            get_vector_store()
+        except Exception as e:
+            logger.error(f"Vector store preload failed: {e}")
+
+    if not background:
+        _load()
+        return None
+
+    thread = threading.Thread(target=_load, name="vector-store-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+def record_query(seconds: float):
+    """Record the duration of one vector search."""
+    with _stats_lock:
+        _stats["query_count"] += 1
+        _stats["query_seconds_total"] += seconds
 
-    vector_store = Chroma(
-        persist_directory=settings.vector_db_path,
-        embedding_function=embeddings,
-        collection_name=settings.vector_db_collection,
-    )
 
-    return vector_store
\ No newline at end of file
+def get_vector_store_stats() -> dict:
+    """Load time vs. per-query time for the shared vector store."""
+    with _stats_lock:
+        count = _stats["query_count"]
+        total = _stats["query_seconds_total"]
+        return {
+            "loaded": _vector_store is not None,
+            "load_ms": round(_stats["load_seconds"] * 1000, 1) if _stats["load_seconds"] is not None else None,
+            "embedding_model_load_ms": round(embeddings_load_seconds() * 1000, 1) if embeddings_load_seconds() is not None else None,
+            "query_count": count,
+            "avg_query_ms": round(total / count * 1000, 2) if count else None,
+            "embedding_cache": get_embedding_cache_stats(),
+        }
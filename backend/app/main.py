@@ -28,6 +28,11 @@ async def lifespan(app: FastAPI):
     logger.info(f"Environment: {settings.app_environment}")
     logger.info(f"LLM configured: {settings.has_llm}")
 
+    # Warm the embedding model + vector store without blocking startup
+    if settings.preload_embeddings:
+        from app.langchain.vector_store import preload_vector_store
+        preload_vector_store(background=True)
+
     # Seed demo data if none exists
     from app.services.email_service import seed_demo_emails
     from app.services.schedule_service import seed_demo_events
@@ -35,12 +40,25 @@ async def lifespan(app: FastAPI):
     seed_demo_events()
     logger.info("Demo data seeded (if empty)")
 
+    # Resolve deadlines of emails stored before they were parsed
+    from app.services.deadline_service import backfill_deadlines, start_deadline_scheduler
+    backfill_deadlines()
+
     # Score all emails on startup (uses rule-based scoring only for fast boot)
     # AI-enhanced scoring happens lazily on individual requests
     from app.services.priority_service import score_all_emails
     scored = score_all_emails(use_llm=False)
     logger.info(f"Priority scores calculated for {len(scored)} emails")
 
+    # From here on only emails whose deadline bucket changes are rescored
+    start_deadline_scheduler()
+
+    # Resume background enrichment (tasks persisted before a restart included)
+    if settings.task_queue_enabled:
+        from app.core.task_queue import get_task_queue
+        import app.services.enrichment_service  # noqa: F401  registers the task handler
+        get_task_queue().start(settings.task_queue_workers)
+
     # NOTE: AI summaries are generated lazily when emails are requested,
     # not at startup. This avoids burning Gemini free-tier quota on boot.
     logger.info("Server ready — AI summaries will be generated on first request")
@@ -48,6 +66,17 @@ async def lifespan(app: FastAPI):
     yield
 
     # ── Shutdown ──
+    from app.services.deadline_service import stop_deadline_scheduler
+    from app.services.draft_service import shutdown_reply_drafts
+    from app.services.email_service import flush_emails
+    stop_deadline_scheduler()
+    shutdown_reply_drafts()
+    if settings.task_queue_enabled:
+        from app.core.task_queue import get_task_queue
+        get_task_queue().stop()
+    flush_emails()
+    from app.core.llm import close_llm_clients
+    await close_llm_clients()
     logger.info(f"{settings.app_name} shutting down")
 
 
@@ -65,6 +94,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # GET /emails/ returns its pagination cursor in this header
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(router)
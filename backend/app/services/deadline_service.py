@@ -0,0 +1,118 @@
+"""
+Deadline-driven rescoring.
+Each stored priority score records `rescore_at`, the moment its email's
+deadline bucket next changes (midnight rollovers, or the deadline itself
+passing). A background thread periodically asks the store for emails
+whose rescore_at has passed (an indexed lookup) and rescores only those,
+so scores decay as deadlines approach without rescoring the mailbox.
+"""
+
+import logging
+import threading
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import settings
+from app.services.deadlines import parse_deadline
+from app.services.email_service import (
+    batched_writes,
+    flush_emails,
+    get_all_emails,
+    get_email_by_id,
+    update_email,
+)
+from app.services.email_store import get_email_store
+
+logger = logging.getLogger(__name__)
+
+_thread: Optional[threading.Thread] = None
+_stopping = threading.Event()
+_stats_lock = threading.Lock()
+_stats = {"runs": 0, "rescored": 0, "last_run_at": None}
+
+
+def backfill_deadlines() -> int:
+    """
+    Parse deadline_at for emails stored before deadlines were parsed,
+    relative to when each email arrived. Returns the number updated.
+    """
+    pending = [e for e in get_all_emails() if "deadline_at" not in e]
+    with batched_writes():
+        for email in pending:
+            try:
+                arrived = datetime.fromisoformat(email.get("created_at", ""))
+            except ValueError:
+                arrived = None
+            deadline_at = parse_deadline(email.get("deadline"), arrived)
+            update_email(email["id"], {"deadline_at": deadline_at.isoformat() if deadline_at else None})
+    if pending:
+        logger.info(f"Parsed deadlines for {len(pending)} existing emails")
+    return len(pending)
+
+
+def rescore_due_deadlines(now: Optional[datetime] = None) -> int:
+    """Rescore the emails whose deadline bucket changed by `now`. Returns the count."""
+    from app.services.draft_service import schedule_reply_drafts
+    from app.services.priority_service import priority_updates, score_email
+
+    now = now or datetime.now()
+    # Deferred writes may hold newer rescore_at values than the store
+    flush_emails()
+    due = get_email_store().due_rescores(now.isoformat())
+
+    rescored = 0
+    with batched_writes():
+        for email_id in due:
+            email = get_email_by_id(email_id, with_body=False)
+            if email is None:
+                continue
+            # Keeps the stored AI urgency; only the deadline weight moves
+            scores = score_email(email, use_llm=False, now=now)
+            if scores != email.get("priority"):
+                update_email(email_id, priority_updates(scores))
+                rescored += 1
+
+    with _stats_lock:
+        _stats["runs"] += 1
+        _stats["rescored"] += rescored
+        _stats["last_run_at"] = now.isoformat()
+    if rescored:
+        logger.info(f"Rescored {rescored} emails whose deadline bucket changed")
+        # The ranking moved; keep reply drafts on the new top-K
+        schedule_reply_drafts()
+    return rescored
+
+
+def start_deadline_scheduler():
+    """Start the rescoring thread (no-op when deadline_rescore_interval <= 0)."""
+    global _thread
+
+    interval = settings.deadline_rescore_interval
+    if interval <= 0 or (_thread is not None and _thread.is_alive()):
+        return
+    _stopping.clear()
+
+    def _run():
+        while not _stopping.wait(interval):
+            try:
+                rescore_due_deadlines()
+            except Exception as e:
+                logger.error(f"Deadline rescoring failed: {e}")
+
+    _thread = threading.Thread(target=_run, name="deadline-rescorer", daemon=True)
+    _thread.start()
+    logger.info(f"Deadline rescoring every {interval:g}s")
+
+
+def stop_deadline_scheduler():
+    global _thread
+
+    _stopping.set()
+    if _thread is not None:
+        _thread.join(timeout=5)
+        _thread = None
+
+
+def get_deadline_stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
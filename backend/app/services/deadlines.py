@@ -0,0 +1,220 @@
+"""
+Deadline helpers shared by scoring, listing and scheduling.
+Kept free of service imports so any module can use them.
+
+Free-text deadlines ("Today, 3:00 PM", "Next Monday") are parsed once at
+ingestion into an absolute `deadline_at`, relative to when the email
+arrived; buckets are then derived from deadline_at and the current time,
+so "today" becomes "overdue" once it has passed. Emails whose text can't
+be parsed (or stored before parsing existed) fall back to classifying
+the text.
+"""
+
+import calendar
+import re
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+# Ordered from most to least urgent
+DEADLINE_BUCKETS = (
+    "overdue", "today", "tomorrow", "this_week", "next_week", "this_month", "future", "none", "later",
+)
+
+# Deadlines without a time of day are due at the end of that day
+_END_OF_DAY = time(23, 59)
+# Days ahead still counted as "this_month"
+_MONTH_DAYS = 30
+
+_WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+_MONTHS = {name.lower()[:3]: i for i, name in enumerate(calendar.month_name) if name}
+
+_NOW = re.compile(r"\b(now|asap|immediately|right away)\b")
+_END_OF = re.compile(r"\b(eod|eow|eom)\b")
+_IN_DELTA = re.compile(r"\bin (\d+) (minute|hour|day|week)s?\b")
+_TIME_12H = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*([ap])\.?m\b")
+_TIME_24H = re.compile(r"\b(\d{1,2}):(\d{2})\b")
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+# Full month names or exact abbreviations only ("Marketing 2" isn't March 2)
+_MONTH_NAMES = "|".join(sorted(
+    {name.lower() for name in (*calendar.month_name, *calendar.month_abbr) if name} | {"sept"},
+    key=len, reverse=True,
+))
+_MONTH_DAY = re.compile(
+    rf"\b({_MONTH_NAMES})\b\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?\b"
+    rf"|\b(\d{{1,2}})(?:st|nd|rd|th)?\s+({_MONTH_NAMES})\b"
+)
+_WEEKDAY = re.compile(r"\b(next |this |by |on )?(" + "|".join(_WEEKDAYS) + r")\b")
+
+
+def deadline_bucket(deadline: str) -> str:
+    """Classify a free-text deadline ("Today, 3:00 PM", "Next Monday", ...)."""
+    deadline_lower = (deadline or "").lower().strip()
+
+    if "overdue" in deadline_lower or "past due" in deadline_lower:
+        return "overdue"
+    elif "today" in deadline_lower or "now" in deadline_lower:
+        return "today"
+    elif "tomorrow" in deadline_lower:
+        return "tomorrow"
+    elif "this week" in deadline_lower:
+        return "this_week"
+    elif "next monday" in deadline_lower or "next week" in deadline_lower:
+        return "next_week"
+    elif "next month" in deadline_lower or "this month" in deadline_lower:
+        return "this_month"
+    elif "no deadline" in deadline_lower or not deadline_lower:
+        return "none"
+    else:
+        return "later"
+
+
+# ── Parsing ────────────────────────────────────────────────────────────
+
+def parse_deadline(deadline: Optional[str], now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Resolve a free-text deadline to an absolute time, relative to `now`
+    (the email's arrival). Returns None for "No deadline" or text that
+    names no recognisable day or time.
+    """
+    text = (deadline or "").lower().strip()
+    now = now or datetime.now()
+    if not text or "no deadline" in text:
+        return None
+    if "overdue" in text or "past due" in text or _NOW.search(text):
+        return now
+
+    match = _IN_DELTA.search(text)
+    if match:
+        return now + timedelta(**{match.group(2) + "s": int(match.group(1))})
+
+    day = _parse_day(text, now.date())
+    at = _parse_time(text)
+    if day is None:
+        if at is None:
+            return None
+        day = now.date()  # a bare time ("3:00 PM") means today
+    return datetime.combine(day, at or _END_OF_DAY)
+
+
+def _parse_day(text: str, today: date) -> Optional[date]:
+    week_start = today - timedelta(days=today.weekday())
+
+    end_of = _END_OF.search(text)
+    end_of = end_of.group(1) if end_of else None
+
+    if "today" in text or "tonight" in text or "end of day" in text or end_of == "eod":
+        return today
+    if "tomorrow" in text:
+        return today + timedelta(days=1)
+    if "next week" in text:
+        return week_start + timedelta(days=7 + 4)  # Friday of next week
+    if "this week" in text or "end of week" in text or end_of == "eow":
+        return max(today, week_start + timedelta(days=4))
+    if "next month" in text:
+        year, month = (today.year + 1, 1) if today.month == 12 else (today.year, today.month + 1)
+        return date(year, month, calendar.monthrange(year, month)[1])
+    if "this month" in text or "end of month" in text or end_of == "eom":
+        return date(today.year, today.month, calendar.monthrange(today.year, today.month)[1])
+
+    match = _WEEKDAY.search(text)
+    if match:
+        weekday = _WEEKDAYS.index(match.group(2))
+        if match.group(1) == "next ":
+            return week_start + timedelta(days=7 + weekday)
+        return today + timedelta(days=(weekday - today.weekday()) % 7)
+
+    match = _ISO_DATE.search(text)
+    if match:
+        try:
+            return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        except ValueError:
+            return None
+
+    match = _MONTH_DAY.search(text)
+    if match:
+        month = _MONTHS[(match.group(1) or match.group(4))[:3]]
+        day = int(match.group(2) or match.group(3))
+        try:
+            parsed = date(today.year, month, day)
+        except ValueError:
+            return None
+        # "Jan 5" written in December means next January
+        if parsed < today - timedelta(days=180):
+            parsed = parsed.replace(year=today.year + 1)
+        return parsed
+
+    return None
+
+
+def _parse_time(text: str) -> Optional[time]:
+    if "noon" in text:
+        return time(12, 0)
+    match = _TIME_12H.search(text)
+    if match:
+        hour, minute = int(match.group(1)) % 12, int(match.group(2) or 0)
+        if match.group(3) == "p":
+            hour += 12
+    else:
+        match = _TIME_24H.search(text)
+        if not match:
+            return None
+        hour, minute = int(match.group(1)), int(match.group(2))
+    if hour > 23 or minute > 59:
+        return None
+    return time(hour, minute)
+
+
+# ── Buckets over Time ──────────────────────────────────────────────────
+
+def deadline_bucket_at(deadline_at: datetime, now: Optional[datetime] = None) -> str:
+    """Bucket of an absolute deadline as seen at `now`."""
+    now = now or datetime.now()
+    if deadline_at <= now:
+        return "overdue"
+
+    days = (deadline_at.date() - now.date()).days
+    week_end = now.date() + timedelta(days=6 - now.weekday())
+    if days == 0:
+        return "today"
+    elif days == 1:
+        return "tomorrow"
+    elif deadline_at.date() <= week_end:
+        return "this_week"
+    elif deadline_at.date() <= week_end + timedelta(days=7):
+        return "next_week"
+    elif days <= _MONTH_DAYS:
+        return "this_month"
+    else:
+        # Parsed and further out than "this_month"; "later" is unparsed text
+        return "future"
+
+
+def email_deadline_bucket(email: dict, now: Optional[datetime] = None) -> str:
+    """Bucket of a stored email, from deadline_at when it was parsed."""
+    deadline_at = email.get("deadline_at")
+    if deadline_at:
+        return deadline_bucket_at(datetime.fromisoformat(deadline_at), now)
+    return deadline_bucket(email.get("deadline", ""))
+
+
+def next_bucket_change(deadline_at: datetime, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    When deadline_bucket_at() next returns a different bucket: a midnight
+    (today/tomorrow/week/month boundaries) or the deadline itself
+    (overdue). None once overdue, which never changes.
+    """
+    now = now or datetime.now()
+    if deadline_at <= now:
+        return None
+
+    current = deadline_bucket_at(deadline_at, now)
+    midnight = datetime.combine(now.date() + timedelta(days=1), time.min)
+    if current == "future":
+        # Nothing changes before it comes within _MONTH_DAYS
+        month_out = datetime.combine(deadline_at.date() - timedelta(days=_MONTH_DAYS), time.min)
+        midnight = max(midnight, month_out)
+    while midnight < deadline_at:
+        if deadline_bucket_at(deadline_at, midnight) != current:
+            return midnight
+        midnight += timedelta(days=1)
+    return deadline_at
@@ -0,0 +1,191 @@
+"""
+Precomputed reply drafts.
+After ingestion and scoring, replies in every tone are generated in the
+background for the top-K most urgent emails and stored on the email
+record, so the reply endpoints can answer without an LLM round-trip.
+
+Drafts are keyed by a hash of the reply inputs and ignored once the email
+changes. Jobs run on a small bounded pool; queued or running jobs for
+emails that drop out of the top-K are cancelled.
+"""
+
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import settings
+from app.core.llm import get_llm
+from app.services.email_service import get_email_by_id, top_k, update_email
+
+logger = logging.getLogger(__name__)
+
+DRAFT_TONES = ("concise", "formal", "direct")
+
+
+class _DraftJob:
+    def __init__(self, content_hash: str):
+        self.content_hash = content_hash
+        self.cancelled = threading.Event()
+        self.future: Optional[Future] = None
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_jobs: dict[str, _DraftJob] = {}
+_jobs_lock = threading.Lock()
+_stats = {"scheduled": 0, "completed": 0, "cancelled": 0, "served": 0}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.reply_drafts_workers),
+                    thread_name_prefix="reply-drafts",
+                )
+    return _executor
+
+
+def draft_inputs_hash(email: dict) -> str:
+    """Fingerprint of everything a reply is generated from."""
+    key = "\0".join((email.get("sender", ""), email.get("subject", ""), email.get("content", "")))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def get_precomputed_reply(email: dict, tone: str) -> Optional[str]:
+    """Return the stored draft for `tone`, unless the email changed since."""
+    drafts = email.get("reply_drafts")
+    if not drafts or drafts.get("content_hash") != draft_inputs_hash(email):
+        return None
+    reply = drafts.get("drafts", {}).get(tone.lower())
+    if reply is not None:
+        with _jobs_lock:
+            _stats["served"] += 1
+    return reply
+
+
+def schedule_reply_drafts() -> int:
+    """
+    Queue draft generation for the current top-K urgency emails that have
+    no up-to-date drafts, and cancel jobs for emails that left the top-K.
+    Returns the number of newly queued jobs.
+    """
+    if not settings.reply_drafts_enabled or get_llm(task="reply") is None:
+        return 0
+
+    # Drafts are keyed on the body, so load it for the (few) top emails only
+    top = [
+        email for email in (get_email_by_id(e["id"]) for e in top_k(max(0, settings.reply_drafts_top_k)))
+        if email is not None
+    ]
+    top_ids = {e["id"] for e in top}
+    dropped, queued = [], []
+
+    with _jobs_lock:
+        for email_id in [i for i in _jobs if i not in top_ids]:
+            dropped.append(_pop_locked(email_id))
+
+        for email in top:
+            content_hash = draft_inputs_hash(email)
+            job = _jobs.get(email["id"])
+            if job is not None:
+                if job.content_hash == content_hash:
+                    continue
+                dropped.append(_pop_locked(email["id"]))
+            drafts = email.get("reply_drafts") or {}
+            if drafts.get("content_hash") == content_hash and \
+                    all(t in drafts.get("drafts", {}) for t in DRAFT_TONES):
+                continue
+
+            job = _DraftJob(content_hash)
+            _jobs[email["id"]] = job
+            job.future = _get_executor().submit(_run_job, email["id"], job)
+            _stats["scheduled"] += 1
+            queued.append((email["id"], job))
+
+    # Outside the lock: a future that is pending (cancel) or already done
+    # (add_done_callback) runs _forget() inline, which takes _jobs_lock
+    _cancel(dropped)
+    for email_id, job in queued:
+        job.future.add_done_callback(lambda _f, i=email_id, j=job: _forget(i, j))
+
+    if queued:
+        logger.info(f"Queued reply drafts for {len(queued)} emails")
+    return len(queued)
+
+
+def _pop_locked(email_id: str) -> _DraftJob:
+    """Drop a job from _jobs; the caller cancels it once _jobs_lock is released."""
+    job = _jobs.pop(email_id)
+    job.cancelled.set()
+    _stats["cancelled"] += 1
+    return job
+
+
+def _cancel(jobs: list[_DraftJob]):
+    for job in jobs:
+        if job.future is not None:
+            job.future.cancel()  # no-op once running; the flag stops it between tones
+
+
+def _forget(email_id: str, job: _DraftJob):
+    with _jobs_lock:
+        if _jobs.get(email_id) is job:
+            del _jobs[email_id]
+
+
+def _run_job(email_id: str, job: _DraftJob):
+    from app.agents.reply_agent import draft_reply
+
+    email = get_email_by_id(email_id)
+    if email is None or draft_inputs_hash(email) != job.content_hash:
+        return
+
+    drafts = {}
+    for tone in DRAFT_TONES:
+        if job.cancelled.is_set():
+            return
+        reply = draft_reply(email["sender"], email["subject"], email.get("content", ""), tone)
+        if reply is None:
+            # No LLM budget or provider error: don't store template replies
+            logger.warning(f"Reply drafts for email {email_id} stopped at tone '{tone}'")
+            break
+        drafts[tone] = reply
+
+    # Re-check: the email may have changed while we were generating
+    current = get_email_by_id(email_id)
+    if not drafts or job.cancelled.is_set() or current is None \
+            or draft_inputs_hash(current) != job.content_hash:
+        return
+
+    update_email(email_id, {"reply_drafts": {
+        "content_hash": job.content_hash,
+        "drafts": drafts,
+        "generated_at": datetime.now().isoformat(),
+    }})
+    with _jobs_lock:
+        _stats["completed"] += 1
+    logger.info(f"Reply drafts ready for email {email_id}: {', '.join(drafts)}")
+
+
+def shutdown_reply_drafts():
+    """Cancel queued draft jobs and stop the pool (called on app shutdown)."""
+    global _executor
+    with _jobs_lock:
+        dropped = [_pop_locked(email_id) for email_id in list(_jobs)]
+    _cancel(dropped)
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def get_draft_stats() -> dict:
+    with _jobs_lock:
+        return {**_stats, "pending": len(_jobs)}
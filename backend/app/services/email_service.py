@@ -1,52 +1,254 @@
 """
 Email processing service.
 Handles storing, retrieving, and processing emails.
-Uses JSON file persistence for development phase.
+Persistence is delegated to the configured email store (see email_store),
+fronted by a process-level write-through cache.
 """
 
-import json
-import os
 import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from typing import Optional
 from datetime import datetime
 
+from sortedcontainers import SortedList
+
 from app.core.config import settings
-from app.langchain.memory import store_memory
+from app.langchain.memory import store_memory, store_memories
+from app.services.deadlines import email_deadline_bucket, parse_deadline
+from app.services.email_store import BODY_FIELDS, get_email_store, rank_key, split_email
 
 logger = logging.getLogger(__name__)
 
-# ── JSON File Storage ──────────────────────────────────────────────────
-DATA_FILE = os.path.join(settings.data_dir, "emails.json")
 
+# ── In-Process Cache ───────────────────────────────────────────────────
+# The parsed mailbox is held in memory and reloaded only when the store's
+# files change underneath us (another worker wrote). Writes update the
+# cache immediately and are marked dirty; they are flushed to the store
+# right away, at the end of a batched_writes() block, or by the periodic
+# flusher when email_cache_flush_interval > 0.
+#
+# Only metadata is cached for the whole mailbox. Bodies (BODY_FIELDS) are
+# loaded on demand into a small LRU; dirty bodies stay until flushed.
+_cache: Optional[dict[str, dict]] = None
+_cache_order: Optional[list[str]] = None  # IDs, newest first
+_ranking: Optional[SortedList] = None  # rank_key()s, most urgent first
+_rank_keys: dict[str, tuple[int, str]] = {}  # ID -> its key in _ranking
+_cache_mtime: int = 0
+_bodies: "OrderedDict[str, dict]" = OrderedDict()  # ID -> body fields
+_dirty: dict[str, Optional[set[str]]] = {}  # ID -> changed fields (None = new)
+_batch_depth = 0
+_cache_lock = threading.RLock()
+_flusher: Optional[threading.Thread] = None
+
+
+def _emails() -> dict[str, dict]:
+    """Return the cached mailbox, reloading it if the store changed."""
+    global _cache, _cache_order, _cache_mtime, _ranking
+
+    with _cache_lock:
+        store = get_email_store()
+        mtime = store.mtime()
+        if _cache is not None and mtime == _cache_mtime:
+            return _cache
+
+        if _dirty:
+            # Keep our pending changes; they win over the external write
+            _flush_locked()
+            mtime = store.mtime()
+
+        _cache = {e["id"]: e for e in store.all()}
+        _cache_order = None
+        _ranking = None
+        _bodies.clear()
+        _cache_mtime = mtime
+        return _cache
+
+
+def _detached(email: dict) -> dict:
+    """
+    Copy of a record that shares no mutable state with the cache (nested
+    priority, ai_summary, thread, ... included), so callers can't change
+    cached emails behind the dirty tracking.
+    """
+    return _copy_json(email)
+
+
+def _copy_json(value):
+    # Records are plain JSON data; much cheaper than copy.deepcopy
+    if isinstance(value, dict):
+        return {k: _copy_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(v) for v in value]
+    return value
+
+
+def _mark_dirty(email_id: str, fields: Optional[set[str]] = None):
+    """
+    Record a changed email and write it out unless writes are deferred.
+    `fields` limits the flush to those fields; None writes the full record.
+    """
+    with _cache_lock:
+        if fields is None or email_id not in _dirty:
+            _dirty[email_id] = fields
+        elif _dirty[email_id] is not None:
+            _dirty[email_id] |= fields
+        if _batch_depth == 0 and settings.email_cache_flush_interval <= 0:
+            _flush_locked()
+        else:
+            _ensure_flusher()
+
+
+def _flush_locked() -> int:
+    global _cache_mtime
+
+    if not _dirty or _cache is None:
+        return 0
+    store = get_email_store()
+    inserts = [
+        {**_cache[i], **_bodies.get(i, {})}
+        for i, fields in _dirty.items()
+        if fields is None and i in _cache
+    ]
+    updates = {
+        i: {f: (_bodies[i] if f in BODY_FIELDS else _cache[i])[f] for f in fields}
+        for i, fields in _dirty.items()
+        if fields is not None and i in _cache
+    }
+    if inserts:
+        store.put_many(inserts)
+    if updates:
+        # Field-level merge, so other workers' changes to other fields survive
+        store.update_many(updates)
+    count = len(_dirty)
+    _dirty.clear()
+    _trim_bodies_locked()
+    # Our own write moved the mtime; don't treat it as an external change
+    _cache_mtime = store.mtime()
+    return count
+
+
+def flush_emails() -> int:
+    """Write all dirty emails to the store. Returns the number written."""
+    with _cache_lock:
+        return _flush_locked()
+
+
+@contextmanager
+def batched_writes():
+    """
+    Defer store writes made inside the block and flush them together
+    on exit, so N updates cost one store write.
+    """
+    global _batch_depth
+
+    with _cache_lock:
+        _batch_depth += 1
+    try:
+        yield
+    finally:
+        with _cache_lock:
+            _batch_depth -= 1
+            if _batch_depth == 0:
+                _flush_locked()
+
+
+def _ensure_flusher():
+    """Start the periodic background flusher (only when configured)."""
+    global _flusher
+
+    interval = settings.email_cache_flush_interval
+    if interval <= 0 or (_flusher is not None and _flusher.is_alive()):
+        return
+
+    def _run():
+        while True:
+            time.sleep(interval)
+            try:
+                flush_emails()
+            except Exception as e:
+                logger.error(f"Periodic email flush failed: {e}")
+
+    _flusher = threading.Thread(target=_run, name="email-cache-flusher", daemon=True)
+    _flusher.start()
+
+
+def _body_locked(email_id: str) -> dict:
+    """Body fields of a cached email, loaded from the store on first use."""
+    body = _bodies.get(email_id)
+    if body is None:
+        body = get_email_store().get_body(email_id)
+        _trim_bodies_locked(reserve=1)
+        _bodies[email_id] = body
+    else:
+        _bodies.move_to_end(email_id)
+    return body
 
-def _ensure_data_dir():
-    """Create data directory if it doesn't exist."""
-    os.makedirs(settings.data_dir, exist_ok=True)
 
+def _trim_bodies_locked(reserve: int = 0):
+    excess = len(_bodies) + reserve - max(0, settings.email_body_cache_size)
+    if excess > 0:
+        # Least recently used first; unflushed bodies are never dropped
+        for email_id in [i for i in _bodies if i not in _dirty][:excess]:
+            del _bodies[email_id]
 
-def _load_emails() -> dict:
-    """Load emails from JSON file."""
-    _ensure_data_dir()
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
 
+# ── Urgency Ranking ────────────────────────────────────────────────────
+# The Priority Inbox order, kept next to the cache and updated per email
+# when urgency changes, so top_k() and rank_of() never re-sort the
+# mailbox. Rebuilt (once) whenever the cache is reloaded.
 
-def _save_emails(emails: dict):
-    """Save emails to JSON file."""
-    _ensure_data_dir()
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(emails, f, indent=2, ensure_ascii=False)
+def _ranked() -> SortedList:
+    global _ranking
+
+    emails = _emails()
+    if _ranking is None:
+        _rank_keys.clear()
+        _rank_keys.update((i, rank_key(e)) for i, e in emails.items())
+        _ranking = SortedList(_rank_keys.values())
+    return _ranking
+
+
+def _rerank(email_id: str):
+    """Move one email to its current position in the ranking."""
+    if _ranking is None:
+        return
+    key = rank_key(_cache[email_id])
+    old = _rank_keys.get(email_id)
+    if old == key:
+        return
+    if old is not None:
+        _ranking.remove(old)
+    _ranking.add(key)
+    _rank_keys[email_id] = key
+
+
+def top_k(n: Optional[int] = None) -> list[dict]:
+    """The n most urgent emails (all when n is None), ties by ID."""
+    with _cache_lock:
+        ranking = _ranked()
+        return [_detached(_cache[key[1]]) for key in ranking.islice(0, n)]
+
+
+def rank_of(email_id: str) -> Optional[int]:
+    """1-based urgency rank of an email, or None if it doesn't exist."""
+    with _cache_lock:
+        ranking = _ranked()
+        key = _rank_keys.get(email_id)
+        return ranking.index(key) + 1 if key is not None else None
 
 
 # ── Email Counter ──────────────────────────────────────────────────────
-def _next_id(emails: dict) -> str:
+def _next_id() -> str:
     """Generate next email ID."""
-    if not emails:
-        return "1"
-    max_id = max(int(k) for k in emails.keys())
-    return str(max_id + 1)
+    return reserve_email_ids(1)[0]
+
+
+def reserve_email_ids(count: int) -> list[str]:
+    """Reserve a block of email IDs up front (used by bulk imports)."""
+    return [str(i) for i in get_email_store().allocate_ids(count)]
 
 
 # ── Public API ─────────────────────────────────────────────────────────
@@ -58,14 +260,65 @@ def process_email(
     deadline: Optional[str] = None,
     email_type: Optional[str] = None,
     sender_email: Optional[str] = None,
+    store_in_memory: bool = True,
 ) -> dict:
     """
     Process a new email: store it and add to semantic memory.
-    Returns the stored email with generated ID.
+    Returns the stored email with generated ID. Pass store_in_memory=False
+    when the embedding is done later (e.g. by the enrichment queue).
     """
-    emails = _load_emails()
-    email_id = _next_id(emails)
+    email_data = _build_email(
+        _next_id(), sender, subject, content, deadline, email_type, sender_email
+    )
+    _insert_emails([email_data])
+
+    # Store in semantic memory for RAG retrieval
+    if store_in_memory:
+        try:
+            store_memory(memory_text(email_data))
+            logger.info(f"Email {email_data['id']} stored in semantic memory")
+        except Exception as e:
+            logger.warning(f"Failed to store email in memory: {e}")
+
+    logger.info(f"Email processed: id={email_data['id']}, from={sender}, subject={subject}")
+    return email_data
 
+
+def process_emails(items: list[dict]) -> list[dict]:
+    """
+    Bulk version of process_email for imports and backfills.
+    Each item takes process_email's keyword arguments. IDs are reserved
+    as one block, all emails are written in a single store transaction,
+    and semantic memory is updated with one batched embedding call.
+    Returns the stored emails in input order.
+    """
+    if not items:
+        return []
+
+    ids = reserve_email_ids(len(items))
+    records = [_build_email(email_id, **item) for email_id, item in zip(ids, items)]
+    _insert_emails(records)
+
+    try:
+        store_memories([memory_text(r) for r in records])
+        logger.info(f"{len(records)} emails stored in semantic memory")
+    except Exception as e:
+        logger.warning(f"Failed to store email batch in memory: {e}")
+
+    logger.info(f"Batch processed: {len(records)} emails (ids {ids[0]}-{ids[-1]})")
+    return records
+
+
+def _build_email(
+    email_id: str,
+    sender: str,
+    subject: str,
+    content: str,
+    deadline: Optional[str] = None,
+    email_type: Optional[str] = None,
+    sender_email: Optional[str] = None,
+) -> dict:
+    """Build a new email record with derived preview, type and deadline_at."""
     # Generate preview (first 100 chars of content)
     preview = content[:100].replace("\n", " ").strip()
     if len(content) > 100:
@@ -75,10 +328,11 @@ def process_email(
     if not email_type:
         email_type = _classify_email_type(subject, preview)
 
-    # Calculate time string
-    time_str = datetime.now().strftime("%I:%M %p").lstrip("0")
+    # Relative deadlines ("Today, 3:00 PM") are resolved against arrival time
+    now = datetime.now()
+    deadline_at = parse_deadline(deadline, now)
 
-    email_data = {
+    return {
         "id": email_id,
         "sender": sender,
         "sender_email": sender_email or "",
@@ -86,9 +340,10 @@ def process_email(
         "content": content,
         "preview": preview,
         "deadline": deadline or "No deadline",
+        "deadline_at": deadline_at.isoformat() if deadline_at else None,
         "type": email_type,
         "time": f"Just now",
-        "created_at": datetime.now().isoformat(),
+        "created_at": now.isoformat(),
         "urgency": 0,  # Will be set by priority service
         "ai_summary": {
             "key_points": [],
@@ -97,43 +352,104 @@ def process_email(
         "thread": [],
     }
 
-    emails[email_id] = email_data
-    _save_emails(emails)
 
-    # Store in semantic memory for RAG retrieval
-    memory_text = f"Email from {sender}: {subject}. {preview}"
-    try:
-        store_memory(memory_text)
-        logger.info(f"Email {email_id} stored in semantic memory")
-    except Exception as e:
-        logger.warning(f"Failed to store email in memory: {e}")
+def _insert_emails(records: list[dict]):
+    """Add new emails to the cache and write them in one store call."""
+    with _cache_lock, batched_writes():
+        emails = _emails()
+        for record in records:
+            emails[record["id"]], _bodies[record["id"]] = split_email(_detached(record))
+            _mark_dirty(record["id"])
+            _rerank(record["id"])
+        if _cache_order is not None:
+            # Records arrive oldest first; the order list is newest first
+            _cache_order[:0] = [r["id"] for r in reversed(records)]
 
-    logger.info(f"Email processed: id={email_id}, from={sender}, subject={subject}")
-    return email_data
+
+def memory_text(email: dict) -> str:
+    return f"Email from {email['sender']}: {email['subject']}. {email['preview']}"
+
+
+def get_all_emails(limit: Optional[int] = None) -> list[dict]:
+    """Get all emails' metadata (no BODY_FIELDS), newest first.
+    `limit` returns only the newest N without copying the rest."""
+    global _cache_order
+
+    with _cache_lock:
+        emails = _emails()
+        if _cache_order is None:
+            _cache_order = sorted(
+                emails, key=lambda i: emails[i].get("created_at", ""), reverse=True
+            )
+        return [_detached(emails[i]) for i in _cache_order[:limit]]
+
+
+def list_emails_page(
+    limit: Optional[int] = None,
+    after: Optional[tuple[int, str]] = None,
+    email_type: Optional[str] = None,
+    sender: Optional[str] = None,
+    deadline: Optional[str] = None,
+) -> list[dict]:
+    """
+    Email metadata by urgency (highest first, ties by ID) for the Priority Inbox,
+    served from the store's urgency index. `after` is the (urgency, id)
+    of the last email on the previous page; `deadline` is a bucket name
+    from deadlines.DEADLINE_BUCKETS.
+    """
+    if email_type is None and sender is None and deadline is None:
+        # Unfiltered: slice the in-memory ranking instead of querying
+        with _cache_lock:
+            ranking = _ranked()
+            start = ranking.bisect_right((-after[0], after[1])) if after is not None else 0
+            stop = start + limit if limit else None
+            return [_detached(_cache[key[1]]) for key in ranking.islice(start, stop)]
+
+    predicate = None
+    if deadline is not None:
+        now = datetime.now()
+        predicate = lambda e: email_deadline_bucket(e, now) == deadline
+
+    # Make deferred writes visible to the store query
+    flush_emails()
+    return get_email_store().page(limit, after, email_type, sender, predicate)
 
 
-def get_all_emails() -> list[dict]:
-    """Get all emails, sorted by creation time (newest first)."""
-    emails = _load_emails()
-    email_list = list(emails.values())
-    email_list.sort(key=lambda e: e.get("created_at", ""), reverse=True)
-    return email_list
+def get_storage_stats() -> dict:
+    """Email count plus the store's body compression/deduplication stats."""
+    store = get_email_store()
+    return {"emails": store.count(), **store.storage_stats()}
 
 
-def get_email_by_id(email_id: str) -> Optional[dict]:
-    """Get a single email by ID."""
-    emails = _load_emails()
-    return emails.get(email_id)
+def get_email_by_id(email_id: str, with_body: bool = True) -> Optional[dict]:
+    """Get a single email by ID. with_body=False skips loading BODY_FIELDS."""
+    with _cache_lock:
+        email = _emails().get(email_id)
+        if email is None:
+            return None
+        if not with_body:
+            return _detached(email)
+        return _detached({**email, **_body_locked(email_id)})
 
 
 def update_email(email_id: str, updates: dict) -> Optional[dict]:
-    """Update specific fields of an email."""
-    emails = _load_emails()
-    if email_id not in emails:
-        return None
-    emails[email_id].update(updates)
-    _save_emails(emails)
-    return emails[email_id]
+    """Update specific fields of an email. Returns the updated metadata."""
+    global _cache_order
+
+    with _cache_lock:
+        emails = _emails()
+        if email_id not in emails:
+            return None
+        meta_updates, body_updates = split_email(_detached(updates))
+        emails[email_id].update(meta_updates)
+        if body_updates:
+            _body_locked(email_id).update(body_updates)
+        if "created_at" in updates:
+            _cache_order = None
+        if "urgency" in updates:
+            _rerank(email_id)
+        _mark_dirty(email_id, set(updates))
+        return _detached(emails[email_id])
 
 
 def _classify_email_type(subject: str, preview: str) -> str:
@@ -157,8 +473,7 @@ def seed_demo_emails():
     Seed the system with demo emails matching the frontend's mock data.
     Only seeds if no emails exist yet.
     """
-    emails = _load_emails()
-    if emails:
+    if _emails():
         return  # Already seeded
 
     demo_emails = [
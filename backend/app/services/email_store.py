@@ -0,0 +1,625 @@
+"""
+Email storage backends.
+Provides the persistence layer behind email_service's public API.
+
+Backends:
+  - sqlite: embedded SQLite database (WAL mode) with a primary-key index
+            and secondary indexes on urgency and created_at. Single-email
+            reads and updates touch one row instead of the whole mailbox.
+            Bodies (BODY_FIELDS) live in a separate table, so listing and
+            scoring only deserialise the compact metadata rows; they are
+            compressed, with repeated paragraphs (quoted replies,
+            signatures) stored once in a shared chunk table.
+  - json:   legacy single-file store (emails.json), rewritten on every save.
+"""
+
+import json
+import os
+import sqlite3
+import logging
+import threading
+from typing import Callable, Optional
+
+from app.core.compression import chunk_hash, codec_name, compress, decompress, split_chunks
+from app.core.config import settings
+from app.core.persistence import IdSequence, atomic_write_json, file_lock, read_json
+
+logger = logging.getLogger(__name__)
+
+JSON_FILE = os.path.join(settings.data_dir, "emails.json")
+SQLITE_FILE = os.path.join(settings.data_dir, "emails.db")
+
+# Large per-email fields kept apart from the metadata record; only
+# single-email reads (detail view, summaries, replies) need them
+BODY_FIELDS = ("content", "thread", "ai_summary", "reply_drafts")
+
+
+def split_email(email: dict) -> tuple[dict, dict]:
+    """Split a record into its (metadata, body) parts."""
+    meta = {k: v for k, v in email.items() if k not in BODY_FIELDS}
+    body = {k: email[k] for k in BODY_FIELDS if k in email}
+    return meta, body
+
+
+class EmailStore:
+    """Interface implemented by every email storage backend."""
+
+    def get(self, email_id: str) -> Optional[dict]:
+        """The full record, body included."""
+        raise NotImplementedError
+
+    def get_body(self, email_id: str) -> dict:
+        """Only the BODY_FIELDS of an email ({} if it has none)."""
+        email = self.get(email_id)
+        return split_email(email)[1] if email else {}
+
+    def all(self) -> list[dict]:
+        """Return the metadata of all emails (no BODY_FIELDS), newest first."""
+        raise NotImplementedError
+
+    def put(self, email: dict):
+        self.put_many([email])
+
+    def put_many(self, emails: list[dict]):
+        raise NotImplementedError
+
+    def update(self, email_id: str, updates: dict) -> Optional[dict]:
+        return self.update_many({email_id: updates}).get(email_id)
+
+    def update_many(self, updates: dict[str, dict]) -> dict[str, dict]:
+        """
+        Merge field updates into existing emails in one atomic step, so
+        concurrent writers touching different fields don't clobber each
+        other. Returns the updated metadata (unknown IDs are skipped).
+        """
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def storage_stats(self) -> dict:
+        """On-disk size of the email bodies and how well they compress."""
+        return {"codec": "none"}
+
+    def page(
+        self,
+        limit: Optional[int] = None,
+        after: Optional[tuple[int, str]] = None,
+        email_type: Optional[str] = None,
+        sender: Optional[str] = None,
+        predicate: Optional[Callable[[dict], bool]] = None,
+    ) -> list[dict]:
+        """
+        Email metadata ordered by (urgency DESC, id), starting after the `after`
+        (urgency, id) cursor. `sender` matches the sender name or address,
+        case-insensitively; `predicate` filters on anything else.
+        Backends without an index fall back to sorting everything.
+        """
+        emails = sorted(self.all(), key=rank_key)
+        if after is not None:
+            emails = [e for e in emails if rank_key(e) > (-after[0], after[1])]
+        matches = (e for e in emails if _matches(e, email_type, sender, predicate))
+        return [e for _, e in zip(range(limit), matches)] if limit else list(matches)
+
+    def due_rescores(self, before: str) -> list[str]:
+        """IDs of emails whose priority.rescore_at (ISO time) is at or before `before`."""
+        return [
+            e["id"] for e in self.all()
+            if (e.get("priority") or {}).get("rescore_at") and e["priority"]["rescore_at"] <= before
+        ]
+
+    def allocate_ids(self, count: int = 1) -> range:
+        """Reserve `count` new, never-reused numeric email IDs."""
+        raise NotImplementedError
+
+    def mtime(self) -> int:
+        """Modification token (ns) of the backing files, used to detect
+        writes made by other worker processes."""
+        raise NotImplementedError
+
+    @staticmethod
+    def _mtime_of(*paths: str) -> int:
+        return max(
+            (os.stat(p).st_mtime_ns for p in paths if os.path.exists(p)),
+            default=0,
+        )
+
+
+def rank_key(email: dict) -> tuple[int, str]:
+    """Sort key matching the store's (urgency DESC, id) order."""
+    return -int(email.get("urgency", 0) or 0), email["id"]
+
+
+def _matches(email: dict, email_type, sender, predicate) -> bool:
+    if email_type is not None and email.get("type") != email_type:
+        return False
+    if sender is not None and sender.lower() not in (
+        email.get("sender", "").lower(), email.get("sender_email", "").lower(),
+    ):
+        return False
+    return predicate is None or predicate(email)
+
+
+# ── JSON Backend ───────────────────────────────────────────────────────
+
+class JsonEmailStore(EmailStore):
+    """Whole-file JSON store. Kept for development and as migration source."""
+
+    def __init__(self, path: str = JSON_FILE):
+        self.path = path
+        self._sequence = IdSequence(path, initial=self._max_id)
+
+    def _load(self) -> dict:
+        return read_json(self.path, {})
+
+    def _save(self, emails: dict):
+        atomic_write_json(self.path, emails)
+
+    def get(self, email_id: str) -> Optional[dict]:
+        return self._load().get(email_id)
+
+    def all(self) -> list[dict]:
+        email_list = [split_email(e)[0] for e in self._load().values()]
+        email_list.sort(key=lambda e: e.get("created_at", ""), reverse=True)
+        return email_list
+
+    def put_many(self, emails: list[dict]):
+        with file_lock(self.path):
+            stored = self._load()
+            for email in emails:
+                stored[email["id"]] = email
+            self._save(stored)
+
+    def update_many(self, updates: dict[str, dict]) -> dict[str, dict]:
+        with file_lock(self.path):
+            stored = self._load()
+            updated = {}
+            for email_id, fields in updates.items():
+                if email_id in stored:
+                    stored[email_id].update(fields)
+                    updated[email_id] = split_email(stored[email_id])[0]
+            if updated:
+                self._save(stored)
+        return updated
+
+    def count(self) -> int:
+        return len(self._load())
+
+    def _max_id(self) -> int:
+        return max((int(k) for k in self._load().keys()), default=0)
+
+    def allocate_ids(self, count: int = 1) -> range:
+        return self._sequence.allocate(count)
+
+    def mtime(self) -> int:
+        return self._mtime_of(self.path)
+
+
+# ── SQLite Backend ─────────────────────────────────────────────────────
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS emails (
+    id          TEXT PRIMARY KEY,
+    urgency     INTEGER NOT NULL DEFAULT 0,
+    created_at  TEXT NOT NULL DEFAULT '',
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_emails_urgency ON emails (urgency DESC, id);
+CREATE INDEX IF NOT EXISTS idx_emails_created_at ON emails (created_at DESC);
+CREATE TABLE IF NOT EXISTS email_bodies (
+    id          TEXT PRIMARY KEY,
+    data        BLOB NOT NULL,
+    raw_size    INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS body_chunks (
+    hash        BLOB PRIMARY KEY,
+    data        BLOB NOT NULL,
+    refs        INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sequences (
+    name        TEXT PRIMARY KEY,
+    last        INTEGER NOT NULL
+);
+"""
+
+# Filter columns derived from the JSON document (added to older databases
+# in place; VIRTUAL columns cost nothing to write and can be indexed)
+_GENERATED_COLUMNS = {
+    "type": "json_extract(data, '$.type')",
+    "sender": "lower(json_extract(data, '$.sender'))",
+    "sender_email": "lower(json_extract(data, '$.sender_email'))",
+    "rescore_at": "json_extract(data, '$.priority.rescore_at')",
+}
+_FILTER_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_emails_type_urgency ON emails (type, urgency DESC, id);
+CREATE INDEX IF NOT EXISTS idx_emails_sender ON emails (sender);
+CREATE INDEX IF NOT EXISTS idx_emails_sender_email ON emails (sender_email);
+CREATE INDEX IF NOT EXISTS idx_emails_rescore_at ON emails (rescore_at) WHERE rescore_at IS NOT NULL;
+"""
+
+# Content paragraphs shorter than this are stored inline in the body row;
+# a chunk reference would cost about as much as the text itself
+_MIN_SHARED_CHUNK = 64
+
+
+class SqliteEmailStore(EmailStore):
+    """
+    SQLite-backed store. Metadata is kept as a JSON document in `emails`
+    (urgency and created_at mirrored into indexed columns) and the body
+    fields as a second document in `email_bodies`, read only on demand.
+
+    Body documents are compressed (see core.compression). `content` is
+    split into paragraphs; long ones are stored once in `body_chunks`
+    (reference-counted, keyed by content hash) and referenced as "#<hash>",
+    short ones inline as "=<text>".
+    """
+
+    # PRAGMA user_version: 1 = bodies split out of the metadata documents,
+    # 2 = bodies compressed and chunk-deduplicated
+    SCHEMA_VERSION = 2
+
+    def __init__(self, path: str = SQLITE_FILE):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_xinfo(emails)")}
+            for name, expression in _GENERATED_COLUMNS.items():
+                if name not in columns:
+                    conn.execute(
+                        f"ALTER TABLE emails ADD COLUMN {name} TEXT "
+                        f"GENERATED ALWAYS AS ({expression}) VIRTUAL"
+                    )
+            conn.executescript(_FILTER_INDEXES)
+            body_columns = {row[1] for row in conn.execute("PRAGMA table_xinfo(email_bodies)")}
+            if "raw_size" not in body_columns:
+                conn.execute("ALTER TABLE email_bodies ADD COLUMN raw_size INTEGER NOT NULL DEFAULT 0")
+
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < 1:
+                self._split_bodies(conn)
+            if version < 2:
+                self._compress_bodies(conn)
+            if version < self.SCHEMA_VERSION:
+                conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    @classmethod
+    def _split_bodies(cls, conn: sqlite3.Connection):
+        """Move body fields of rows written before the split into email_bodies."""
+        has_body = " OR ".join(f"json_type(data, '$.{f}') IS NOT NULL" for f in BODY_FIELDS)
+        rows = conn.execute(f"SELECT id, data FROM emails WHERE {has_body}").fetchall()
+        for email_id, data in rows:
+            meta, body = split_email(json.loads(data))
+            conn.execute(
+                "UPDATE emails SET data = ? WHERE id = ?",
+                (json.dumps(meta, ensure_ascii=False), email_id),
+            )
+            cls._write_body(conn, email_id, body, cls._stored_body(conn, email_id))
+        if rows:
+            logger.info(f"Split bodies out of {len(rows)} email records")
+
+    @classmethod
+    def _compress_bodies(cls, conn: sqlite3.Connection):
+        """Re-encode body rows stored as plain JSON text."""
+        rows = conn.execute(
+            "SELECT id, data FROM email_bodies WHERE typeof(data) = 'text'"
+        ).fetchall()
+        for email_id, data in rows:
+            # Plain-JSON rows hold no chunk references to release
+            cls._write_body(conn, email_id, json.loads(data), None)
+        if rows:
+            logger.info(f"Compressed {len(rows)} email bodies ({codec_name()})")
+
+    def _conn(self) -> sqlite3.Connection:
+        """Per-thread connection (WAL lets readers run alongside a writer)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(meta: dict) -> tuple:
+        return (
+            meta["id"],
+            int(meta.get("urgency", 0) or 0),
+            meta.get("created_at", ""),
+            json.dumps(meta, ensure_ascii=False),
+        )
+
+    @staticmethod
+    def _stored_body(conn: sqlite3.Connection, email_id: str) -> Optional[dict]:
+        """The body row's document as stored (chunk references unresolved)."""
+        row = conn.execute(
+            "SELECT data FROM email_bodies WHERE id = ?", (email_id,)
+        ).fetchone()
+        return _load_body_doc(row[0]) if row else None
+
+    @staticmethod
+    def _resolve_body(conn: sqlite3.Connection, doc: Optional[dict]) -> dict:
+        """Rebuild the body fields from a stored document."""
+        if not doc:
+            return {}
+        body = dict(doc)
+        parts = body.pop("$content", None)
+        if parts is not None:
+            digests = list({bytes.fromhex(p[1:]) for p in parts if p[0] == "#"})
+            chunks = {}
+            if digests:
+                rows = conn.execute(
+                    f"SELECT hash, data FROM body_chunks WHERE hash IN ({', '.join('?' * len(digests))})",
+                    digests,
+                ).fetchall()
+                chunks = {digest.hex(): decompress(data).decode("utf-8") for digest, data in rows}
+            body["content"] = "".join(chunks[p[1:]] if p[0] == "#" else p[1:] for p in parts)
+        return body
+
+    @staticmethod
+    def _write_body(conn: sqlite3.Connection, email_id: str, body: dict, stored: Optional[dict]):
+        """
+        Replace an email's body row, sharing long content paragraphs via
+        body_chunks. `stored` is the row's current document (_stored_body),
+        whose chunk references are released.
+        """
+        if stored:
+            # Drop the references held by the row being replaced
+            old = [(bytes.fromhex(p[1:]),) for p in stored.get("$content", []) if p[0] == "#"]
+            conn.executemany("UPDATE body_chunks SET refs = refs - 1 WHERE hash = ?", old)
+            conn.executemany("DELETE FROM body_chunks WHERE hash = ? AND refs <= 0", old)
+
+        doc = dict(body)
+        content = doc.pop("content", None)
+        if content is not None:
+            parts = []
+            for chunk in split_chunks(content):
+                if len(chunk) < _MIN_SHARED_CHUNK:
+                    parts.append("=" + chunk)
+                    continue
+                digest = chunk_hash(chunk)
+                if conn.execute(
+                    "UPDATE body_chunks SET refs = refs + 1 WHERE hash = ?", (digest,)
+                ).rowcount == 0:
+                    conn.execute(
+                        "INSERT INTO body_chunks (hash, data, refs) VALUES (?, ?, 1)",
+                        (digest, compress(chunk.encode("utf-8"))),
+                    )
+                parts.append("#" + digest.hex())
+            doc["$content"] = parts
+
+        raw_size = len(json.dumps(body, ensure_ascii=False).encode("utf-8"))
+        conn.execute(
+            "INSERT OR REPLACE INTO email_bodies (id, data, raw_size) VALUES (?, ?, ?)",
+            (email_id, compress(json.dumps(doc, ensure_ascii=False).encode("utf-8")), raw_size),
+        )
+
+    def get(self, email_id: str) -> Optional[dict]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT e.data, b.data FROM emails e "
+            "LEFT JOIN email_bodies b ON b.id = e.id WHERE e.id = ?",
+            (email_id,),
+        ).fetchone()
+        if not row:
+            return None
+        email = json.loads(row[0])
+        if row[1] is not None:
+            email.update(self._resolve_body(conn, _load_body_doc(row[1])))
+        return email
+
+    def get_body(self, email_id: str) -> dict:
+        conn = self._conn()
+        return self._resolve_body(conn, self._stored_body(conn, email_id))
+
+    def all(self) -> list[dict]:
+        rows = self._conn().execute(
+            "SELECT data FROM emails ORDER BY created_at DESC"
+        ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def put_many(self, emails: list[dict]):
+        parts = [split_email(e) for e in emails]
+        conn = self._conn()
+        with conn:
+            # Chunk reference counts are read-modify-write too
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT OR REPLACE INTO emails (id, urgency, created_at, data) "
+                "VALUES (?, ?, ?, ?)",
+                [self._row(meta) for meta, _ in parts],
+            )
+            for meta, body in parts:
+                self._write_body(conn, meta["id"], body, self._stored_body(conn, meta["id"]))
+
+    def update_many(self, updates: dict[str, dict]) -> dict[str, dict]:
+        conn = self._conn()
+        updated = {}
+        with conn:
+            # Take the write lock up front so the read-modify-write is atomic
+            conn.execute("BEGIN IMMEDIATE")
+            for email_id, fields in updates.items():
+                row = conn.execute(
+                    "SELECT data FROM emails WHERE id = ?", (email_id,)
+                ).fetchone()
+                if not row:
+                    continue
+                meta_fields, body_fields = split_email(fields)
+                meta = json.loads(row[0])
+                if meta_fields:
+                    meta.update(meta_fields)
+                    conn.execute(
+                        "UPDATE emails SET urgency = ?, created_at = ?, data = ? WHERE id = ?",
+                        self._row(meta)[1:] + (email_id,),
+                    )
+                if body_fields:
+                    stored = self._stored_body(conn, email_id)
+                    body = self._resolve_body(conn, stored)
+                    body.update(body_fields)
+                    self._write_body(conn, email_id, body, stored)
+                updated[email_id] = meta
+        return updated
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM emails").fetchone()[0]
+
+    def storage_stats(self) -> dict:
+        conn = self._conn()
+        bodies, raw_bytes, row_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(length(data)), 0) "
+            "FROM email_bodies"
+        ).fetchone()
+        chunks, chunk_bytes, chunk_refs = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length(data)), 0), COALESCE(SUM(refs), 0) "
+            "FROM body_chunks"
+        ).fetchone()
+        stored_bytes = row_bytes + chunk_bytes
+        return {
+            "codec": codec_name(),
+            "bodies": bodies,
+            "raw_bytes": raw_bytes,
+            "stored_bytes": stored_bytes,
+            "compression_ratio": round(raw_bytes / stored_bytes, 2) if stored_bytes else None,
+            "shared_chunks": chunks,
+            "chunk_references": chunk_refs,
+        }
+
+    def page(
+        self,
+        limit: Optional[int] = None,
+        after: Optional[tuple[int, str]] = None,
+        email_type: Optional[str] = None,
+        sender: Optional[str] = None,
+        predicate: Optional[Callable[[dict], bool]] = None,
+    ) -> list[dict]:
+        # Keyset pagination: each page is an index range scan, so its cost
+        # doesn't grow with the page number or the mailbox size
+        where, params = [], []
+        if email_type is not None:
+            where.append("type = ?")
+            params.append(email_type)
+        if sender is not None:
+            where.append("(sender = ? OR sender_email = ?)")
+            params += [sender.lower(), sender.lower()]
+
+        results = []
+        batch = max(limit or 0, 100)
+        while True:
+            clauses = list(where)
+            if after is not None:
+                clauses.append("(urgency < ? OR (urgency = ? AND id > ?))")
+                args = params + [after[0], after[0], after[1]]
+            else:
+                args = list(params)
+            sql = "SELECT urgency, id, data FROM emails"
+            if clauses:
+                sql += " WHERE " + " AND ".join(clauses)
+            sql += " ORDER BY urgency DESC, id LIMIT ?"
+            rows = self._conn().execute(sql, args + [batch]).fetchall()
+
+            for urgency, email_id, data in rows:
+                email = json.loads(data)
+                if predicate is None or predicate(email):
+                    results.append(email)
+                    if limit and len(results) == limit:
+                        return results
+            if len(rows) < batch:
+                return results
+            # Predicate filtered some rows out; continue from the last one scanned
+            after = (rows[-1][0], rows[-1][1])
+
+    def due_rescores(self, before: str) -> list[str]:
+        rows = self._conn().execute(
+            "SELECT id FROM emails WHERE rescore_at <= ?", (before,)
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def allocate_ids(self, count: int = 1) -> range:
+        if count < 1:
+            return range(0)
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT last FROM sequences WHERE name = 'emails'"
+            ).fetchone()
+            if row:
+                last = row[0]
+            else:
+                # First allocation: seed from existing (e.g. migrated) rows
+                last = conn.execute(
+                    "SELECT COALESCE(MAX(CAST(id AS INTEGER)), 0) FROM emails"
+                ).fetchone()[0]
+            conn.execute(
+                "INSERT OR REPLACE INTO sequences (name, last) VALUES ('emails', ?)",
+                (last + count,),
+            )
+        return range(last + 1, last + count + 1)
+
+    def mtime(self) -> int:
+        # Commits land in the -wal file until checkpointed
+        return self._mtime_of(self.path, self.path + "-wal")
+
+
+def _load_body_doc(data) -> dict:
+    if isinstance(data, str):  # plain JSON, written before compression
+        return json.loads(data)
+    return json.loads(decompress(data))
+
+
+# ── Migration ──────────────────────────────────────────────────────────
+
+def migrate_json_store(target: EmailStore, json_path: str = JSON_FILE) -> int:
+    """
+    One-shot import of the legacy emails.json into `target`.
+    Only runs when the target is empty; the JSON file is renamed to
+    `<name>.migrated` afterwards so the import never repeats.
+    Returns the number of emails migrated.
+    """
+    if not os.path.exists(json_path):
+        return 0
+
+    # Workers starting together all see an empty store; one imports, and
+    # the rest find the file already renamed once they get the lock
+    with file_lock(json_path):
+        if not os.path.exists(json_path) or target.count() > 0:
+            return 0
+
+        emails = JsonEmailStore(json_path)._load()
+        target.put_many(list(emails.values()))
+        os.replace(json_path, json_path + ".migrated")
+    logger.info(f"Migrated {len(emails)} emails from {json_path}")
+    return len(emails)
+
+
+# ── Backend Selection ──────────────────────────────────────────────────
+
+_store_instance: Optional[EmailStore] = None
+_store_lock = threading.Lock()
+
+
+def get_email_store() -> EmailStore:
+    """Get the configured email store (created once per process)."""
+    global _store_instance
+
+    if _store_instance is not None:
+        return _store_instance
+
+    with _store_lock:
+        if _store_instance is not None:
+            return _store_instance
+
+        backend = settings.email_store_backend
+        if backend == "sqlite":
+            store = SqliteEmailStore()
+            migrate_json_store(store)
+        elif backend == "json":
+            store = JsonEmailStore()
+        else:
+            raise ValueError(f"Unknown email store backend: {backend}")
+
+        logger.info(f"Email store initialized: {backend}")
+        _store_instance = store
+
+    return _store_instance
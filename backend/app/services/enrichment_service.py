@@ -0,0 +1,131 @@
+"""
+Post-ingest enrichment.
+Embeds a new email into semantic memory, generates its AI summary and
+scores its priority as a task on the durable queue, so ingestion can
+return as soon as the email is stored.
+
+Progress is recorded on the email as `enrichment` (status, completed
+steps, attempts, last error), which GET /emails/{id}/status reports. A
+retried task skips the steps that already succeeded. LLM failures are
+retried with backoff; the final attempt accepts rule-based fallbacks and,
+if embedding still fails, an email missing from semantic memory.
+"""
+
+import logging
+from datetime import datetime
+from typing import Optional
+
+from app.core.llm import get_llm
+from app.core.task_queue import get_task_queue, register_task_handler
+from app.langchain.memory import store_memory
+from app.services.draft_service import schedule_reply_drafts
+from app.services.email_service import get_email_by_id, memory_text, update_email
+from app.services.priority_service import priority_updates, score_email
+from app.services.summary_service import generate_email_summary
+
+logger = logging.getLogger(__name__)
+
+TASK_KIND = "enrich_email"
+ENRICHMENT_STEPS = ("memory", "summary", "priority")
+
+
+def enqueue_enrichment(email_id: str) -> bool:
+    """Queue enrichment for a stored email. Returns False if already queued."""
+    email = get_email_by_id(email_id, with_body=False)
+    if email is None:
+        return False
+    if (email.get("enrichment") or {}).get("status") not in ("queued", "running", "retrying"):
+        # Recorded before enqueueing so a fast worker's "running" isn't overwritten
+        _set_state(email_id, status="queued", steps=[], attempts=0, error=None)
+    return get_task_queue().enqueue(TASK_KIND, {"email_id": email_id}, key=f"{TASK_KIND}:{email_id}")
+
+
+def get_enrichment_status(email_id: str) -> Optional[dict]:
+    """Enrichment progress for an email (None if the email doesn't exist)."""
+    email = get_email_by_id(email_id, with_body=False)
+    if email is None:
+        return None
+    # Emails stored before the queue existed (or enriched inline) count as done
+    state = email.get("enrichment") or {"status": "done", "steps": list(ENRICHMENT_STEPS)}
+    return {
+        "id": email_id,
+        "status": state.get("status"),
+        "steps": state.get("steps", []),
+        "attempts": state.get("attempts", 0),
+        "error": state.get("error"),
+        "updated_at": state.get("updated_at"),
+        "urgency": email.get("urgency", 0),
+    }
+
+
+def _set_state(email_id: str, **fields):
+    email = get_email_by_id(email_id, with_body=False)
+    if email is None:
+        return
+    state = dict(email.get("enrichment") or {})
+    state.update(fields, updated_at=datetime.now().isoformat())
+    update_email(email_id, {"enrichment": state})
+
+
+def _enrich_task(payload: dict, attempt: int, last_attempt: bool):
+    email_id = payload["email_id"]
+    email = get_email_by_id(email_id)
+    if email is None:
+        logger.warning(f"Enrichment skipped: email {email_id} no longer exists")
+        return
+
+    done = list((email.get("enrichment") or {}).get("steps", []))
+    _set_state(email_id, status="running", attempts=attempt)
+
+    def store():
+        store_memory(memory_text(email))
+
+    def summarize():
+        # Until the last attempt, an LLM failure is retried, not papered over
+        summary = generate_email_summary(
+            sender=email["sender"],
+            subject=email["subject"],
+            content=email.get("content", ""),
+            fallback=last_attempt,
+        )
+        update_email(email_id, {"ai_summary": summary})
+
+    def prioritize():
+        scores = score_email(get_email_by_id(email_id, with_body=False) or email)
+        # Persist even a rule-based score so the email ranks sensibly now
+        update_email(email_id, priority_updates(scores))
+        llm_expected = get_llm(task="priority") is not None
+        if scores["ai_source"] != "llm" and llm_expected and not last_attempt:
+            raise RuntimeError("AI urgency unavailable; rule-based score kept for now")
+
+    # Steps are independent: a failed embedding mustn't hold back the summary and score
+    errors = {}
+    for step, run in zip(ENRICHMENT_STEPS, (store, summarize, prioritize)):
+        if step in done:
+            continue
+        try:
+            run()
+        except Exception as e:
+            logger.warning(f"Enrichment step '{step}' failed for email {email_id}: {e}")
+            errors[step] = str(e)
+            continue
+        done.append(step)
+        _set_state(email_id, steps=done)
+
+    if errors:
+        error = "; ".join(f"{step}: {e}" for step, e in errors.items())
+        if not last_attempt or set(errors) != {"memory"}:
+            _set_state(email_id, status="failed" if last_attempt else "retrying", error=error)
+            raise RuntimeError(error)
+        # Out of attempts: keep the AI enrichment, the email just isn't searchable
+        _set_state(email_id, status="done", error=error)
+        logger.warning(f"Email {email_id} enriched without semantic memory (attempt {attempt})")
+        schedule_reply_drafts()
+        return
+
+    _set_state(email_id, status="done", error=None)
+    logger.info(f"Email {email_id} enriched (attempt {attempt})")
+    schedule_reply_drafts()
+
+
+register_task_handler(TASK_KIND, _enrich_task)
@@ -6,15 +6,37 @@ Calculates email priority using a weighted scoring system:
   - AI Urgency:       0-20 points (NLP-detected urgency signals)
 
 Total score: 0-100
+
+Scores are persisted on the email record (under "priority") together with
+a fingerprint of the scoring inputs and the deadline bucket they were
+computed for, and reused until the inputs change or the deadline moves to
+another bucket (deadline_service rescores emails as that happens).
 """
 
+import hashlib
 import json
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-from app.core.llm import get_llm, parse_llm_json_response
-from app.core.prompts import PRIORITY_SCORING_PROMPT
-from app.services.email_service import get_all_emails, update_email
+from app.core.config import settings
+from app.core.llm import (
+    get_llm,
+    invoke_llm,
+    ainvoke_llm,
+    parse_llm_json_response,
+    parse_llm_json_list_response,
+)
+from app.core.prompts import PRIORITY_SCORING_PROMPT, PRIORITY_SCORING_BATCH_PROMPT
+from app.services.deadlines import email_deadline_bucket, next_bucket_change
+from app.services.email_service import (
+    get_all_emails,
+    get_email_by_id,
+    update_email,
+    batched_writes,
+    top_k,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -31,29 +53,33 @@ SENDER_WEIGHTS = {
 }
 DEFAULT_SENDER_WEIGHT = 15
 
+# Bump when scoring rules or prompts change to invalidate stored scores
+SCORING_VERSION = 1
+
 
 # ── Deadline Scoring ───────────────────────────────────────────────────
 
-def _calculate_deadline_weight(deadline: str) -> tuple[int, str]:
+def _calculate_deadline_weight(deadline: str, bucket: str) -> tuple[int, str]:
     """
-    Calculate deadline urgency score (0-50).
+    Calculate deadline urgency score (0-50) for the email's current
+    deadline bucket (see deadlines.email_deadline_bucket).
     Returns (score, reasoning).
     """
-    deadline_lower = deadline.lower().strip()
-
-    if "overdue" in deadline_lower or "past due" in deadline_lower:
+    if bucket == "overdue":
         return 50, "Item is overdue — maximum deadline urgency"
-    elif "today" in deadline_lower or "now" in deadline_lower:
+    elif bucket == "today":
         return 45, "Deadline is today — extremely time-sensitive"
-    elif "tomorrow" in deadline_lower:
+    elif bucket == "tomorrow":
         return 40, "Deadline is tomorrow — high time pressure"
-    elif "this week" in deadline_lower:
+    elif bucket == "this_week":
         return 35, "Due this week — significant time pressure"
-    elif "next monday" in deadline_lower or "next week" in deadline_lower:
+    elif bucket == "next_week":
         return 30, "Due next week — moderate time pressure"
-    elif "next month" in deadline_lower or "this month" in deadline_lower:
+    elif bucket == "this_month":
         return 20, "Due this month — standard timeline"
-    elif "no deadline" in deadline_lower or not deadline_lower:
+    elif bucket == "future":
+        return 15, "Due more than a month out — low time pressure"
+    elif bucket == "none":
         return 10, "No explicit deadline set"
     else:
         return 25, f"Deadline: {deadline} — moderate urgency"
@@ -85,13 +111,13 @@ def _calculate_sender_weight(sender: str) -> tuple[int, str]:
 def _calculate_ai_urgency(
     sender: str, subject: str, deadline: str, preview: str,
     use_llm: bool = True,
-) -> tuple[int, str]:
+) -> tuple[int, str, str]:
     """
     Calculate AI urgency score (0-20) using LLM or fallback.
-    Returns (score, reasoning).
+    Returns (score, reasoning, source) where source is "llm" or "rules".
     """
     if use_llm:
-        llm = get_llm()
+        llm = get_llm(task="priority")
     else:
         llm = None
 
@@ -100,16 +126,84 @@ def _calculate_ai_urgency(
             prompt = PRIORITY_SCORING_PROMPT.format(
                 sender=sender, subject=subject, deadline=deadline, preview=preview
             )
-            response = llm.invoke(prompt)
-            result = parse_llm_json_response(response)
-            score = min(20, max(0, int(result.get("ai_urgency_score", 15))))
-            reasoning = result.get("reasoning", "AI-assessed urgency")
-            return score, reasoning
+            response = invoke_llm(llm, prompt, validate=parse_llm_json_response)
+            return _ai_urgency_result(response)
         except Exception as e:
             logger.warning(f"LLM urgency scoring failed: {e}")
 
     # Fallback: keyword-based urgency
-    return _fallback_ai_urgency(subject, preview)
+    return (*_fallback_ai_urgency(subject, preview), "rules")
+
+
+async def _acalculate_ai_urgency(
+    sender: str, subject: str, deadline: str, preview: str,
+    use_llm: bool = True,
+) -> tuple[int, str, str]:
+    """Async _calculate_ai_urgency (uses the model's native ainvoke)."""
+    llm = get_llm(task="priority") if use_llm else None
+
+    if llm is not None:
+        try:
+            prompt = PRIORITY_SCORING_PROMPT.format(
+                sender=sender, subject=subject, deadline=deadline, preview=preview
+            )
+            response = await ainvoke_llm(llm, prompt, validate=parse_llm_json_response)
+            return _ai_urgency_result(response)
+        except Exception as e:
+            logger.warning(f"LLM urgency scoring failed: {e}")
+
+    return (*_fallback_ai_urgency(subject, preview), "rules")
+
+
+def _ai_urgency_result(response) -> tuple[int, str, str]:
+    result = parse_llm_json_response(response)
+    score = min(20, max(0, int(result.get("ai_urgency_score", 15))))
+    reasoning = result.get("reasoning", "AI-assessed urgency")
+    return score, reasoning, "llm"
+
+
+def _calculate_ai_urgency_batch(items: dict[str, dict]) -> dict[str, tuple[int, str, str]]:
+    """
+    Score several emails with one LLM call (PRIORITY_SCORING_BATCH_PROMPT).
+    `items` maps email ID to scoring inputs. Returns results only for the
+    items that came back valid; callers score the rest individually.
+    """
+    llm = get_llm(task="priority")
+    if llm is None or not items:
+        return {}
+
+    payload = [
+        {
+            "id": email_id,
+            "from": inputs["sender"],
+            "subject": inputs["subject"],
+            "deadline": inputs["deadline"],
+            "preview": inputs["preview"],
+        }
+        for email_id, inputs in items.items()
+    ]
+    try:
+        prompt = PRIORITY_SCORING_BATCH_PROMPT.format(
+            emails=json.dumps(payload, indent=2, ensure_ascii=False)
+        )
+        response = invoke_llm(llm, prompt, validate=parse_llm_json_list_response)
+        parsed = parse_llm_json_list_response(response)
+    except Exception as e:
+        logger.warning(f"Batched LLM urgency scoring failed ({len(items)} emails): {e}")
+        return {}
+
+    results = {}
+    for email_id in items:
+        result = parsed.get(email_id)
+        try:
+            score = min(20, max(0, int(result["ai_urgency_score"])))
+        except (TypeError, KeyError, ValueError):
+            continue  # missing or malformed item: scored individually
+        results[email_id] = (score, str(result.get("reasoning") or "AI-assessed urgency"), "llm")
+
+    if len(results) < len(items):
+        logger.info(f"Batched scoring: {len(items) - len(results)} of {len(items)} items need single calls")
+    return results
 
 
 def _fallback_ai_urgency(subject: str, preview: str) -> tuple[int, str]:
@@ -142,26 +236,79 @@ def _fallback_ai_urgency(subject: str, preview: str) -> tuple[int, str]:
 
 # ── Public API ─────────────────────────────────────────────────────────
 
-def score_email(email: dict, use_llm: bool = True) -> dict:
+def _scoring_inputs(email: dict) -> dict:
+    return {
+        "sender": email.get("sender", ""),
+        "subject": email.get("subject", ""),
+        "deadline": email.get("deadline", "No deadline"),
+        "preview": email.get("preview", "") or email.get("content", "")[:300] or email.get("subject", ""),
+    }
+
+
+def _fingerprint(inputs: dict) -> str:
+    raw = json.dumps([SCORING_VERSION, inputs], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _ai_urgency_reusable(email: dict, use_llm: bool, force: bool = False) -> bool:
+    """Whether the stored AI urgency still matches the email's inputs."""
+    stored = email.get("priority") or {}
+    wants_llm = use_llm and get_llm(task="priority") is not None
+    return (
+        not force
+        and stored.get("fingerprint") == _fingerprint(_scoring_inputs(email))
+        and (stored.get("ai_source") == "llm" or not wants_llm)
+    )
+
+
+def score_email(
+    email: dict,
+    use_llm: bool = True,
+    force: bool = False,
+    ai_result: tuple[int, str, str] | None = None,
+    now: datetime | None = None,
+) -> dict:
     """
     Calculate full priority score for a single email.
-    Returns updated email dict with urgency and breakdown.
+    Returns the score breakdown plus fingerprint metadata.
+
+    Scores stored on the email are reused when the inputs are unchanged
+    and its deadline is still in the same bucket. An LLM-based AI urgency
+    is kept regardless; a rule-based one is upgraded once an LLM is
+    requested and available. Pass force=True to rescore from scratch, or
+    `ai_result` to supply an AI urgency computed elsewhere (batching).
+
+    `rescore_at` in the result is when the deadline bucket next changes
+    (see deadline_service).
     """
-    deadline_weight, deadline_reason = _calculate_deadline_weight(
-        email.get("deadline", "No deadline")
-    )
-    sender_weight, sender_reason = _calculate_sender_weight(
-        email.get("sender", "Unknown")
-    )
-    ai_urgency, urgency_reason = _calculate_ai_urgency(
-        sender=email.get("sender", ""),
-        subject=email.get("subject", ""),
-        deadline=email.get("deadline", "No deadline"),
-        preview=email.get("preview", "") or email.get("content", "")[:300] or email.get("subject", ""),
-        use_llm=use_llm,
-    )
+    inputs = _scoring_inputs(email)
+    fingerprint = _fingerprint(inputs)
+    now = now or datetime.now()
+    bucket = email_deadline_bucket(email, now)
+
+    stored = email.get("priority") or {}
+    reusable = ai_result is None and _ai_urgency_reusable(email, use_llm, force)
+    if reusable and stored.get("deadline_bucket") == bucket:
+        return dict(stored)
+
+    deadline_weight, deadline_reason = _calculate_deadline_weight(inputs["deadline"], bucket)
+    sender_weight, sender_reason = _calculate_sender_weight(inputs["sender"] or "Unknown")
+    if ai_result is not None:
+        ai_urgency, urgency_reason, ai_source = ai_result
+    elif reusable:
+        # Only the deadline weight needs refreshing
+        ai_urgency, urgency_reason, ai_source = (
+            stored["ai_urgency"], stored["urgency_reasoning"], stored["ai_source"],
+        )
+    else:
+        ai_urgency, urgency_reason, ai_source = _calculate_ai_urgency(
+            **inputs, use_llm=use_llm,
+        )
 
     total_score = deadline_weight + sender_weight + ai_urgency
+    rescore_at = None
+    if email.get("deadline_at"):
+        rescore_at = next_bucket_change(datetime.fromisoformat(email["deadline_at"]), now)
 
     return {
         "total_score": total_score,
@@ -171,9 +318,66 @@ def score_email(email: dict, use_llm: bool = True) -> dict:
         "deadline_reasoning": deadline_reason,
         "sender_reasoning": sender_reason,
         "urgency_reasoning": urgency_reason,
+        "ai_source": ai_source,
+        "fingerprint": fingerprint,
+        "deadline_bucket": bucket,
+        "rescore_at": rescore_at.isoformat() if rescore_at else None,
     }
 
 
+async def ascore_email(email: dict, use_llm: bool = True, force: bool = False) -> dict:
+    """Async score_email: the AI urgency LLM call (if needed) uses ainvoke."""
+    ai_result = None
+    if not _ai_urgency_reusable(email, use_llm, force):
+        ai_result = await _acalculate_ai_urgency(**_scoring_inputs(email), use_llm=use_llm)
+    return score_email(email, use_llm=use_llm, force=force, ai_result=ai_result)
+
+
+def score_emails(emails: list[dict], use_llm: bool = True) -> list[dict]:
+    """
+    Score many emails, in input order.
+
+    Emails needing a fresh AI urgency are packed llm_batch_size per LLM
+    call; items missing from a batched response fall back to single
+    calls. LLM calls run concurrently (priority_scoring_concurrency); the
+    provider rate limiter in invoke_llm paces them and rule-based scoring
+    takes over for emails that can't get budget in time.
+    """
+    if not use_llm or get_llm(task="priority") is None:
+        return [score_email(e, use_llm=use_llm) for e in emails]
+
+    def _concurrently(fn, items):
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(
+            max_workers=settings.priority_scoring_concurrency,
+            thread_name_prefix="priority-scoring",
+        ) as pool:
+            return list(pool.map(fn, items))
+
+    packed: dict[str, tuple[int, str, str]] = {}
+    batch_size = settings.llm_batch_size
+    if batch_size > 1:
+        pending = [e for e in emails if not _ai_urgency_reusable(e, use_llm=True)]
+        if len(pending) > 1:
+            chunks = [
+                {e["id"]: _scoring_inputs(e) for e in pending[i:i + batch_size]}
+                for i in range(0, len(pending), batch_size)
+            ]
+            for results in _concurrently(_calculate_ai_urgency_batch, chunks):
+                packed.update(results)
+
+    return _concurrently(
+        lambda e: score_email(e, use_llm=True, ai_result=packed.get(e["id"])),
+        emails,
+    )
+
+
+def priority_updates(scores: dict) -> dict:
+    """Email fields to persist for a score_email() result."""
+    return {"urgency": scores["total_score"], "priority": scores}
+
+
 def score_all_emails(use_llm: bool = True) -> list[dict]:
     """
     Score all emails and return ranked list.
@@ -182,47 +386,124 @@ def score_all_emails(use_llm: bool = True) -> list[dict]:
     """
     emails = get_all_emails()
     scored = []
-
-    for email in emails:
-        scores = score_email(email, use_llm=use_llm)
-
-        # Update stored email with urgency score
-        update_email(email["id"], {"urgency": scores["total_score"]})
-
-        scored.append({
-            "id": email["id"],
-            "sender": email["sender"],
-            "subject": email["subject"],
-            "deadline": email.get("deadline", "No deadline"),
-            "total_score": scores["total_score"],
-            "deadline_weight": scores["deadline_weight"],
-            "sender_weight": scores["sender_weight"],
-            "ai_urgency": scores["ai_urgency"],
-            "deadline_reasoning": scores["deadline_reasoning"],
-            "sender_reasoning": scores["sender_reasoning"],
-            "urgency_reasoning": scores["urgency_reasoning"],
-        })
-
-    # Sort by total score descending, assign ranks
-    scored.sort(key=lambda x: x["total_score"], reverse=True)
-    for i, item in enumerate(scored):
+    all_scores = score_emails(emails, use_llm=use_llm)
+
+    # Collapse the per-email urgency updates into a single store write
+    with batched_writes():
+        for email, scores in zip(emails, all_scores):
+            # Persist only scores that were actually recomputed
+            if scores != email.get("priority"):
+                update_email(email["id"], priority_updates(scores))
+
+            scored.append({
+                "id": email["id"],
+                "sender": email["sender"],
+                "subject": email["subject"],
+                "deadline": email.get("deadline", "No deadline"),
+                "total_score": scores["total_score"],
+                "deadline_weight": scores["deadline_weight"],
+                "sender_weight": scores["sender_weight"],
+                "ai_urgency": scores["ai_urgency"],
+                "deadline_reasoning": scores["deadline_reasoning"],
+                "sender_reasoning": scores["sender_reasoning"],
+                "urgency_reasoning": scores["urgency_reasoning"],
+            })
+
+    # urgency == total_score, so the maintained urgency ranking is already
+    # the ranked order; no need to sort the scored list
+    by_id = {item["id"]: item for item in scored}
+    ranked = [by_id[e["id"]] for e in top_k() if e["id"] in by_id]
+    for i, item in enumerate(ranked):
         item["rank"] = i + 1
 
-    return scored
+    return ranked
 
 
 def get_priority_explanation(email_id: str) -> dict | None:
     """Get detailed priority explanation for a specific email."""
-    emails = get_all_emails()
-    email = next((e for e in emails if e["id"] == email_id), None)
+    email = get_email_by_id(email_id, with_body=False)
 
     if not email:
         return None
 
     scores = score_email(email)
+    if scores != email.get("priority"):
+        update_email(email_id, priority_updates(scores))
     return {
         "id": email_id,
         "sender": email["sender"],
         "subject": email["subject"],
         **scores,
     }
+
+
+def benchmark_score_emails(
+    count: int = 1000,
+    latency: float = 0.05,
+    concurrency_levels: tuple[int, ...] = (1, 4, 16, 64),
+) -> dict:
+    """
+    Wall-clock of score_emails() for `count` unscored emails against a fake
+    chat model taking `latency` seconds per call, at each
+    priority_scoring_concurrency level. One email per call, with the
+    response cache and provider rate limit off, so only concurrency varies.
+    """
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+    from app.core import llm as llm_module
+    from app.core.rate_limit import provider_of, reset_rate_limiters
+
+    fake = FakeListChatModel(
+        responses=['{"ai_urgency_score": 12, "reasoning": "benchmark"}'], sleep=latency,
+    )
+    emails = [
+        {
+            "id": str(i),
+            "sender": f"Sender {i % 50}",
+            "subject": f"Quarterly report #{i}",
+            "content": "Please review the attached figures before Friday's meeting.",
+            "deadline": "Next week",
+        }
+        for i in range(count)
+    ]
+
+    # Swapped in for the run only, then restored (see graph.benchmark_agent_app)
+    rate_setting = f"{provider_of(fake)}_requests_per_minute"
+    saved_llm = llm_module._llm_instance
+    saved_settings = {
+        name: getattr(settings, name)
+        for name in (
+            "llm_model_priority", "llm_cache_enabled", "llm_batch_size",
+            "priority_scoring_concurrency", rate_setting,
+        )
+    }
+    llm_module._llm_instance = fake
+    settings.llm_model_priority = ""
+    settings.llm_cache_enabled = False
+    settings.llm_batch_size = 1
+    setattr(settings, rate_setting, 0)
+    reset_rate_limiters()
+
+    results = {}
+    try:
+        for concurrency in concurrency_levels:
+            settings.priority_scoring_concurrency = concurrency
+            started = time.perf_counter()
+            scores = score_emails(emails)
+            elapsed = time.perf_counter() - started
+            results[concurrency] = {
+                "seconds": round(elapsed, 2),
+                "emails_per_second": round(count / elapsed, 1),
+                "llm_scored": sum(s["ai_source"] == "llm" for s in scores),
+            }
+    finally:
+        llm_module._llm_instance = saved_llm
+        for name, value in saved_settings.items():
+            setattr(settings, name, value)
+        reset_rate_limiters()
+
+    return {"emails": count, "latency_seconds": latency, "concurrency": results}
+
+
+if __name__ == "__main__":
+    print(json.dumps(benchmark_score_emails(), indent=2))
@@ -3,13 +3,13 @@ Schedule management service.
 Handles calendar events with JSON file persistence.
 """
 
-import json
 import os
 import logging
 from datetime import datetime, date
 from typing import Optional
 
 from app.core.config import settings
+from app.core.persistence import IdSequence, atomic_write_json, file_lock, read_json
 
 logger = logging.getLogger(__name__)
 
@@ -22,23 +22,24 @@ def _ensure_data_dir():
 
 def _load_events() -> list[dict]:
     _ensure_data_dir()
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
+    return read_json(DATA_FILE, [])
 
 
 def _save_events(events: list[dict]):
+    """Atomically replace the events file. Callers must hold file_lock."""
     _ensure_data_dir()
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(events, f, indent=2, ensure_ascii=False)
+    atomic_write_json(DATA_FILE, events)
 
 
-def _next_id(events: list[dict]) -> str:
-    if not events:
-        return "1"
-    max_id = max(int(e.get("id", 0)) for e in events)
-    return str(max_id + 1)
+def _max_id() -> int:
+    return max((int(e.get("id", 0)) for e in _load_events()), default=0)
+
+
+_id_sequence = IdSequence(DATA_FILE, initial=_max_id)
+
+
+def _next_id() -> str:
+    return str(_id_sequence.allocate()[0])
 
 
 # ── Public API ─────────────────────────────────────────────────────────
@@ -51,24 +52,25 @@ def create_event(
     event_date: Optional[str] = None,
 ) -> dict:
     """Create a new schedule event."""
-    events = _load_events()
-    event_id = _next_id(events)
-
     if not event_date:
         event_date = date.today().isoformat()
 
-    event = {
-        "id": event_id,
-        "title": title,
-        "description": description,
-        "start_time": start_time,
-        "end_time": end_time,
-        "date": event_date,
-        "created_at": datetime.now().isoformat(),
-    }
-
-    events.append(event)
-    _save_events(events)
+    with file_lock(DATA_FILE):
+        events = _load_events()
+        event_id = _next_id()
+
+        event = {
+            "id": event_id,
+            "title": title,
+            "description": description,
+            "start_time": start_time,
+            "end_time": end_time,
+            "date": event_date,
+            "created_at": datetime.now().isoformat(),
+        }
+
+        events.append(event)
+        _save_events(events)
     logger.info(f"Created event: {title} at {start_time}-{end_time}")
     return event
 
@@ -91,12 +93,13 @@ def get_all_events() -> list[dict]:
 
 def delete_event(event_id: str) -> bool:
     """Delete an event by ID."""
-    events = _load_events()
-    original_len = len(events)
-    events = [e for e in events if e.get("id") != event_id]
-    if len(events) < original_len:
-        _save_events(events)
-        return True
+    with file_lock(DATA_FILE):
+        events = _load_events()
+        original_len = len(events)
+        events = [e for e in events if e.get("id") != event_id]
+        if len(events) < original_len:
+            _save_events(events)
+            return True
     return False
 
 
@@ -105,36 +108,37 @@ def seed_demo_events():
     Seed demo schedule events matching the frontend's Today's Schedule.
     Only seeds if no events exist yet.
     """
-    events = _load_events()
-    if events:
-        return
-
-    today = date.today().isoformat()
-    demo_events = [
-        {
-            "title": "Executive Team Sync",
-            "description": "Weekly alignment meeting",
-            "start_time": "10:00",
-            "end_time": "11:00",
-            "event_date": today,
-        },
-        {
-            "title": "Q4 Board Meeting",
-            "description": "Strategic review with board members",
-            "start_time": "15:00",
-            "end_time": "16:30",
-            "event_date": today,
-        },
-        {
-            "title": "1:1 with Emily",
-            "description": "Performance review discussion",
-            "start_time": "17:00",
-            "end_time": "17:30",
-            "event_date": today,
-        },
-    ]
-
-    for evt in demo_events:
-        create_event(**evt)
-
-    logger.info(f"Seeded {len(demo_events)} demo schedule events")
+    # Hold the lock across check-and-seed so concurrent workers seed once
+    with file_lock(DATA_FILE):
+        if _load_events():
+            return
+
+        today = date.today().isoformat()
+        demo_events = [
+            {
+                "title": "Executive Team Sync",
+                "description": "Weekly alignment meeting",
+                "start_time": "10:00",
+                "end_time": "11:00",
+                "event_date": today,
+            },
+            {
+                "title": "Q4 Board Meeting",
+                "description": "Strategic review with board members",
+                "start_time": "15:00",
+                "end_time": "16:30",
+                "event_date": today,
+            },
+            {
+                "title": "1:1 with Emily",
+                "description": "Performance review discussion",
+                "start_time": "17:00",
+                "end_time": "17:30",
+                "event_date": today,
+            },
+        ]
+
+        for evt in demo_events:
+            create_event(**evt)
+
+        logger.info(f"Seeded {len(demo_events)} demo schedule events")
@@ -8,18 +8,34 @@ import json
 import logging
 from typing import Optional
 
-from app.core.llm import get_llm, parse_llm_json_response
-from app.core.prompts import EMAIL_SUMMARY_PROMPT, DASHBOARD_SUMMARY_PROMPT
+from app.core.config import settings
+from app.core.llm import (
+    get_llm,
+    invoke_llm,
+    ainvoke_llm,
+    parse_llm_json_response,
+    parse_llm_json_list_response,
+)
+from app.core.prompts import (
+    EMAIL_SUMMARY_PROMPT,
+    EMAIL_SUMMARY_BATCH_PROMPT,
+    DASHBOARD_SUMMARY_PROMPT,
+)
 
 logger = logging.getLogger(__name__)
 
 
-def generate_email_summary(sender: str, subject: str, content: str) -> dict:
+def generate_email_summary(
+    sender: str, subject: str, content: str, use_cache: bool = True,
+    fallback: bool = True,
+) -> dict:
     """
     Generate AI summary for a single email.
     Returns dict with key_points and suggested_actions.
+    Set use_cache=False to force a fresh LLM call. With fallback=False an
+    LLM failure is raised instead of returning the rule-based summary.
     """
-    llm = get_llm()
+    llm = get_llm(task="summary")
 
     if llm is None:
         return _fallback_email_summary(sender, subject, content)
@@ -30,22 +46,110 @@ def generate_email_summary(sender: str, subject: str, content: str) -> dict:
             subject=subject,
             content=content,
         )
-        response = llm.invoke(prompt)
-        result = parse_llm_json_response(response)
-        return {
-            "key_points": result.get("key_points", []),
-            "suggested_actions": result.get("suggested_actions", []),
-        }
+        response = invoke_llm(
+            llm, prompt, cache=use_cache, validate=parse_llm_json_response
+        )
+        return _email_summary_result(response)
+    except Exception as e:
+        if not fallback:
+            raise
+        logger.error(f"LLM email summary failed: {e}")
+        return _fallback_email_summary(sender, subject, content)
+
+
+async def agenerate_email_summary(
+    sender: str, subject: str, content: str, use_cache: bool = True,
+) -> dict:
+    """Async generate_email_summary (uses the model's native ainvoke)."""
+    llm = get_llm(task="summary")
+
+    if llm is None:
+        return _fallback_email_summary(sender, subject, content)
+
+    try:
+        prompt = EMAIL_SUMMARY_PROMPT.format(
+            sender=sender,
+            subject=subject,
+            content=content,
+        )
+        response = await ainvoke_llm(
+            llm, prompt, cache=use_cache, validate=parse_llm_json_response
+        )
+        return _email_summary_result(response)
     except Exception as e:
         logger.error(f"LLM email summary failed: {e}")
         return _fallback_email_summary(sender, subject, content)
 
 
+def _email_summary_result(response) -> dict:
+    result = parse_llm_json_response(response)
+    return {
+        "key_points": result.get("key_points", []),
+        "suggested_actions": result.get("suggested_actions", []),
+    }
+
+
+def generate_email_summaries(emails: list[dict]) -> list[dict]:
+    """
+    Generate AI summaries for several emails, in input order.
+    Packs llm_batch_size emails per LLM call (EMAIL_SUMMARY_BATCH_PROMPT);
+    items that are missing or malformed in a batched response are retried
+    with generate_email_summary.
+    """
+    llm = get_llm(task="summary")
+    batch_size = settings.llm_batch_size
+
+    packed: dict[str, dict] = {}
+    if llm is not None and batch_size > 1 and len(emails) > 1:
+        for i in range(0, len(emails), batch_size):
+            packed.update(_summarize_batch(llm, emails[i:i + batch_size]))
+
+    return [
+        packed.get(e["id"]) or generate_email_summary(
+            sender=e["sender"], subject=e["subject"], content=e.get("content", ""),
+        )
+        for e in emails
+    ]
+
+
+def _summarize_batch(llm, emails: list[dict]) -> dict[str, dict]:
+    """One packed summary call. Returns valid summaries keyed by email ID."""
+    payload = [
+        {
+            "id": e["id"],
+            "from": e["sender"],
+            "subject": e["subject"],
+            "content": e.get("content", ""),
+        }
+        for e in emails
+    ]
+    try:
+        prompt = EMAIL_SUMMARY_BATCH_PROMPT.format(
+            emails=json.dumps(payload, indent=2, ensure_ascii=False)
+        )
+        response = invoke_llm(llm, prompt, validate=parse_llm_json_list_response)
+        parsed = parse_llm_json_list_response(response)
+    except Exception as e:
+        logger.warning(f"Batched LLM email summary failed ({len(emails)} emails): {e}")
+        return {}
+
+    summaries = {}
+    for email_id, item in parsed.items():
+        key_points = item.get("key_points")
+        actions = item.get("suggested_actions")
+        if isinstance(key_points, list) and isinstance(actions, list) and key_points:
+            summaries[email_id] = {
+                "key_points": [str(p) for p in key_points],
+                "suggested_actions": [str(a) for a in actions],
+            }
+    return summaries
+
+
 def generate_dashboard_summary(emails: list[dict]) -> dict:
     """
     Generate dashboard morning briefing from a list of emails.
     """
-    llm = get_llm()
+    llm = get_llm(task="dashboard")
 
     if llm is None or not emails:
         return _fallback_dashboard_summary(emails)
@@ -57,7 +161,7 @@ def generate_dashboard_summary(emails: list[dict]) -> dict:
             for e in emails
         )
         prompt = DASHBOARD_SUMMARY_PROMPT.format(emails_summary=emails_text)
-        response = llm.invoke(prompt)
+        response = invoke_llm(llm, prompt, validate=parse_llm_json_response)
         result = parse_llm_json_response(response)
         return result
     except Exception as e: